@@ -0,0 +1,221 @@
+import os
+import sys
+import csv
+import glob
+import json
+import tempfile
+import time
+import multiprocessing
+from multiprocessing.connection import wait
+from n_queens import N_QUEENS
+from coloring import COLORING, chromatic_number
+from stats import SolveStats
+from budget import Budget, BudgetExceeded, Timeout
+
+try:
+    import resource
+except ImportError:  # Windows: no per-process memory limit
+    resource = None
+
+
+minima_coloring = {"myciel3.col.txt": 4, "myciel4.col.txt": 5, "myciel5.col.txt": 6, "myciel6.col.txt": 7, "myciel7.col.txt": 8,
+                   "david.col.txt": 11, "miles1000.col.txt": 42, "fpsol2.i.1.col": 65, "fpsol2.i.2.col": 30, "fpsol2.i.3.col": 30,
+                   "inithx.i.1.col": 54, "inithx.i.2.col": 31, "inithx.i.3.col": 31}
+METHOD_FIELDS = ['use_ac3', 'use_ac3_meanwhile', 'fc', 'var_heuristic', 'val_heuristic', 'engine']
+FIELDNAMES = ['instance'] + METHOD_FIELDS + ['method', 'status', 'execution_time', 'nb_colors']
+STATS_FIELDS = SolveStats.FIELDS  # optional columns (see run_benchmark's record_stats)
+
+
+def build_problem(type_problem, instance, method, budget=None):
+    """
+    Build the problem instance for one benchmark run
+    :param type_problem: "n_queens" (instance is n) or "coloring" (instance is the path of a .col file, colored with its known minimum)
+    :param method: dictionary with at least "var_heuristic" and "val_heuristic"
+    :param budget: budget.Budget also limiting the constraint generation (BudgetExceeded is raised when it runs out)
+    """
+    if type_problem == "n_queens":
+        return N_QUEENS(int(instance), method["var_heuristic"], method["val_heuristic"], budget=budget, lazy=False)
+    elif type_problem == "coloring":
+        return COLORING(instance, minima_coloring[os.path.basename(instance)], method["var_heuristic"], method["val_heuristic"], budget=budget)
+    raise ValueError(f"Unknown problem type: {type_problem}")
+
+
+def run_one(type_problem, instance, method, time_limit=None):
+    """
+    Build and solve one (instance, method) pair in the current process
+    :param type_problem: "n_queens", "coloring", or "chromatic" (compute the chromatic number of a .col file with chromatic_number,
+                         method["engine"] being "csp" or "dsatur")
+    :return: (status, execution_time, nb_colors, stats) where status is "solved", "unsat" or "timeout"; the time includes the model construction;
+             nb_colors is the best number of colors found for "chromatic" (None otherwise); stats is the dictionary of the solver
+             statistics (SolveStats.as_dict(), None for "chromatic")
+    """
+    start = time.time()
+    if type_problem == "chromatic":
+        # Stop slightly before the hard limit so that the best coloring found is still reported
+        nb_colors, _, proven = chromatic_number(instance, time_limit=None if time_limit is None else 0.9 * time_limit, **method)
+        return ("solved" if proven else "timeout"), time.time() - start, nb_colors, None
+    budget = Budget(time_limit=time_limit)  # shared by the model construction and the resolution
+    try:
+        prob = build_problem(type_problem, instance, method, budget=budget)
+    except BudgetExceeded:
+        return "timeout", time.time() - start, None, None
+    options = {key: value for key, value in method.items() if key not in ("var_heuristic", "val_heuristic", "engine")}
+    sol = prob.solve(budget=budget, **options)
+    execution_time = time.time() - start
+    stats = prob.stats.as_dict()
+    if isinstance(sol, dict):
+        return "solved", execution_time, None, stats
+    return ("timeout" if isinstance(sol, Timeout) else "unsat"), execution_time, None, stats
+
+
+def _benchmark_worker(type_problem, instance, method, time_limit, memory_limit, connection):
+    # Child process: apply the memory limit, silence the solver output and report (status, time, nb_colors, stats) through the pipe
+    start = time.time()
+    try:
+        if memory_limit is not None and resource is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        sys.stdout = open(os.devnull, 'w')
+        connection.send(run_one(type_problem, instance, method, time_limit))
+    except BaseException as error:
+        connection.send(("crash", time.time() - start, None, None, repr(error)))
+    finally:
+        connection.close()
+
+
+def method_key(method):
+    # Canonical text of a method (every option, sorted): stored in the "method" column of the CSV file
+    return json.dumps(method, sort_keys=True, default=str)
+
+
+def run_key(instance, method):
+    # Identify a run: the instance and every option of the method, so that methods differing only in an option outside
+    # METHOD_FIELDS (backjumping, restarts, seed...) are distinct runs
+    return str(instance), method_key(method)
+
+
+def load_results(file_path):
+    """
+    Read the results already stored in a CSV file
+    :return: list of rows (dictionaries); files written before the status column existed are read with status "solved",
+             method columns missing from older files are read as "False"; files written before the "method" column existed
+             get it rebuilt from the METHOD_FIELDS columns (the only options they recorded)
+    """
+    if not os.path.exists(file_path):
+        return []
+    with open(file_path, 'r', newline='') as csvfile:
+        rows = list(csv.DictReader(csvfile))
+    for row in rows:
+        if not row.get('status'):
+            row['status'] = "solved"
+        for field in METHOD_FIELDS:
+            if row.get(field) is None:
+                row[field] = "False"
+        if not row.get('method'):
+            method = {field: {"True": True, "False": False}.get(row[field], row[field]) for field in METHOD_FIELDS}
+            if method["engine"] is False:
+                del method["engine"]  # engine is only set for the "chromatic" runs
+            row['method'] = method_key(method)
+    return rows
+
+
+def run_benchmark(type_problem, instances, methods, file_path=None, time_limit=20, memory_limit=None, processes=None, resume=True, record_stats=False):
+    """
+    Run every (method, instance) pair in a pool of worker processes, each with a hard wall-clock limit
+    :param instances: list of instances (n for "n_queens", paths of .col files for "coloring")
+    :param methods: list of methods (dictionaries with "use_ac3", "use_ac3_meanwhile", "fc", "var_heuristic", "val_heuristic"
+                    and optionally any other solve() option)
+    :param file_path: CSV file where each result is appended as soon as it is known (None: no file)
+    :param time_limit: wall-clock limit in seconds for one run, model construction included; the worker is killed when it is exceeded
+    :param memory_limit: address-space limit in bytes for one run (Unix only); exceeding it is reported as a crash
+    :param processes: number of runs in parallel (number of cores by default)
+    :param resume: if True, skip the runs already present in file_path so that an interrupted sweep continues where it stopped
+    :param record_stats: if True, also write the solver statistics (STATS_FIELDS: nodes, backtracks, checks, revisions, prunings,
+                         max depth and time per phase) in the CSV file; they are left empty for runs that did not report them
+    :return: dictionary run_key -> row, for every pair of the grid (including the ones read back from file_path)
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    fieldnames = FIELDNAMES + STATS_FIELDS if record_stats else FIELDNAMES
+    results = {}
+    if file_path is not None:
+        rows = load_results(file_path) if resume else []
+        for row in rows:
+            results[(row['instance'], row['method'])] = row
+        # Rewrite the file with the current columns and the kept rows (atomically, through a temporary file of its own so
+        # that concurrent sweeps do not clobber each other), new results are then appended to it
+        with tempfile.NamedTemporaryFile('w', newline='', dir=os.path.dirname(os.path.abspath(file_path)), suffix=".tmp", delete=False) as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(csvfile.name, file_path)
+
+    pending = [(instance, method) for method in methods for instance in instances if run_key(instance, method) not in results]
+    context = multiprocessing.get_context()
+    running = {}  # reader -> (process, instance, method, start)
+    try:
+        while pending or running:
+            while pending and len(running) < processes:
+                instance, method = pending.pop(0)
+                reader, writer = context.Pipe(duplex=False)
+                process = context.Process(target=_benchmark_worker, args=(type_problem, instance, method, time_limit, memory_limit, writer), daemon=True)
+                process.start()
+                writer.close()
+                running[reader] = (process, instance, method, time.time())
+
+            timeout = None
+            if time_limit is not None:
+                timeout = max(min(start + time_limit for _, _, _, start in running.values()) - time.time(), 0)
+            ready = set(wait(list(running), timeout=timeout))
+            now = time.time()
+            for reader, (process, instance, method, start) in list(running.items()):
+                if reader in ready:
+                    try:
+                        status, execution_time, nb_colors, stats = reader.recv()[:4]
+                    except EOFError:  # killed by the system (e.g. out of memory) before reporting
+                        status, execution_time, nb_colors, stats = "crash", now - start, None, None
+                elif time_limit is not None and now - start >= time_limit:
+                    process.kill()
+                    status, execution_time, nb_colors, stats = "timeout", now - start, None, None
+                else:
+                    continue
+                process.join()
+                reader.close()
+                del running[reader]
+                row = {'instance': instance, 'status': status, 'execution_time': round(execution_time, 6), 'nb_colors': '' if nb_colors is None else nb_colors}
+                row.update({field: method.get(field, False) for field in METHOD_FIELDS})
+                row['method'] = method_key(method)
+                if record_stats:
+                    row.update({field: '' if stats is None else stats[field] for field in STATS_FIELDS})
+                results[run_key(instance, method)] = row
+                print(f"Instance: {instance}, Method: {method}, Status: {status}, Time: {execution_time:.4f} seconds")
+                if file_path is not None:
+                    with open(file_path, 'a', newline='') as csvfile:
+                        csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction='ignore').writerow(row)
+    finally:
+        for reader, (process, _, _, _) in running.items():
+            process.kill()
+            process.join()
+            reader.close()
+    return results
+
+
+def benchmark_coloring_engines(instances=None, methods=None, file_path=None, time_limit=60, processes=None, resume=True):
+    """
+    Compare the chromatic-number computation of the generic CSP solver and of the DSATUR engine
+    :param instances: paths of .col files (every instance file in instances/coloring by default)
+    :param methods: chromatic_number options, each with an "engine" key ("csp" or "dsatur")
+    :param file_path: CSV file for the results (results/chromatic_results.csv by default)
+    :return: dictionary run_key -> row, see run_benchmark
+    """
+    if instances is None:
+        instances = sorted(path for path in glob.glob(os.path.join("instances", "coloring", "*")) if not path.endswith(".npz"))
+    if methods is None:
+        methods = [{"engine": "csp", "use_ac3": True, "fc": True, "var_heuristic": "dom/wdeg", "val_heuristic": "static"},
+                   {"engine": "dsatur", "use_ac3": False, "fc": False, "var_heuristic": "static", "val_heuristic": "static"}]
+    if file_path is None:
+        file_path = os.path.join(os.getcwd(), "results", "chromatic_results.csv")
+    return run_benchmark("chromatic", instances, methods, file_path=file_path, time_limit=time_limit, processes=processes, resume=resume)
+
+
+if __name__ == "__main__":
+    benchmark_coloring_engines()
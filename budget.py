@@ -0,0 +1,120 @@
+import os
+import time
+import threading
+
+try:
+    import resource
+except ImportError:  # Windows : pas de mesure de la mémoire du processus
+    resource = None
+
+MEMORY_CHECK_PERIOD = 1024  # la mémoire n'est mesurée qu'une fois sur MEMORY_CHECK_PERIOD tests du budget
+
+
+def memory_usage():
+    # Mémoire résidente actuelle du processus en octets (pic de mémoire résidente si elle n'est pas disponible), None si inconnue
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # en kilo-octets sous Linux
+    return None
+
+
+class BudgetExceeded(Exception):
+    # Levée quand le budget est épuisé pendant la construction d'un modèle (il n'y a alors aucun résultat à retourner)
+    def __init__(self, reason):
+        super().__init__(f"Budget épuisé ({reason})")
+        self.reason = reason
+
+
+class Timeout:
+    # Résultat d'une résolution interrompue par son budget, distinct de "No solution found" (qui est une preuve) :
+    # reason : "time", "nodes", "memory" ou "cancelled" ; partial : meilleure assignation partielle atteinte (la plus profonde)
+    def __init__(self, reason, partial=None):
+        self.reason = reason
+        self.partial = partial if partial is not None else {}
+
+    def __repr__(self):
+        return f"Timeout({self.reason!r}, {len(self.partial)} variables assigned)"
+
+
+class Budget:
+    # Ressources allouées à une résolution : temps (horloge monotone), nombre de nœuds et plafond de mémoire (octets).
+    # Le même budget est partagé par toutes les étapes (construction des contraintes, cohérence d'arc, recherche) et
+    # peut être annulé depuis un autre thread avec cancel(). Une fois épuisé il le reste, reason indique pourquoi.
+    def __init__(self, time_limit=None, max_nodes=None, max_memory=None):
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.max_memory = max_memory
+        self.start = time.monotonic()
+        self.deadline = None if time_limit is None else self.start + time_limit
+        self.nodes = 0  # nœuds consommés (valeurs essayées par la recherche)
+        self.reason = None  # None tant que le budget n'est pas épuisé
+        self.cancelled = threading.Event()
+        self.calls = 0
+
+    def cancel(self):
+        # Demander l'arrêt (depuis n'importe quel thread) : la résolution s'arrête au prochain test du budget
+        self.cancelled.set()
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def remaining(self):
+        # Temps restant en secondes (None sans limite de temps)
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0)
+
+    def exhausted(self):
+        # Tester le budget : True s'il est épuisé (temps, nœuds, mémoire ou annulation)
+        if self.reason is not None:
+            return True
+        if self.cancelled.is_set():
+            self.reason = "cancelled"
+        elif self.deadline is not None and time.monotonic() > self.deadline:
+            self.reason = "time"
+        elif self.max_nodes is not None and self.nodes >= self.max_nodes:
+            self.reason = "nodes"
+        elif self.max_memory is not None:
+            self.calls += 1
+            if self.calls % MEMORY_CHECK_PERIOD == 1:
+                usage = memory_usage()
+                if usage is not None and usage > self.max_memory:
+                    self.reason = "memory"
+        return self.reason is not None
+
+    def check(self):
+        # Lever BudgetExceeded si le budget est épuisé (pour les étapes qui ne peuvent pas retourner de résultat partiel)
+        if self.exhausted():
+            raise BudgetExceeded(self.reason)
+
+    def child(self):
+        # Budget équivalent pour un autre processus : même échéance et mêmes plafonds, nœuds restants
+        # (l'annulation n'est pas transmise, le processus principal arrête lui-même ses fils)
+        max_nodes = None if self.max_nodes is None else max(self.max_nodes - self.nodes, 0)
+        return Budget(time_limit=self.remaining(), max_nodes=max_nodes, max_memory=self.max_memory)
+
+    def __getstate__(self):
+        # Le verrou de l'événement d'annulation ne se transmet pas entre processus
+        state = self.__dict__.copy()
+        state["cancelled"] = self.cancelled.is_set()
+        return state
+
+    def __setstate__(self, state):
+        cancelled = state.pop("cancelled")
+        self.__dict__.update(state)
+        self.cancelled = threading.Event()
+        if cancelled:
+            self.cancelled.set()
+
+
+def as_budget(budget=None, time_limit=None):
+    # Budget donné, ou budget limité au seul temps time_limit (sans limite si None)
+    if budget is not None:
+        if time_limit is not None:
+            raise ValueError("Donner soit un budget, soit une limite de temps, pas les deux.")
+        return budget
+    return Budget(time_limit=time_limit)
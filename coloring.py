@@ -1,61 +1,67 @@
-import networkx as nx
 import os
+import sys
+import time
+import hashlib
+import multiprocessing
+from multiprocessing.connection import wait
 from model import CSP
+from constraints import NotEqual
+from graph import ArrayGraph, load_col
+from dsatur import DSATUR, dsatur_greedy, greedy_clique
+from stats import SolveStats
+from budget import BudgetExceeded, Timeout, as_budget
 import matplotlib.pyplot as plt
 import matplotlib.cm as cm
 import numpy as np
 
-def read_file_col(file_path):
-    # Lire le fichier de description du graphe et construire le graphe avec NetworkX
-    with open(file_path, 'r') as file:
-        lines = file.readlines()
-    vertices = []
-    graph = nx.Graph()
-    for line in lines:
-        if line.startswith('e'):
-            # Ajouter les arêtes du graphe à partir des lignes commençant par 'e'
-            _, vertex_1, vertex_2 = line.split()
-            if vertex_1 not in vertices:
-                vertices.append(vertex_1)
-            if vertex_2 not in vertices:
-                vertices.append(vertex_2)
-            graph.add_edge(int(vertex_1), int(vertex_2))
-    print("nb vertices:", len(vertices))
+try:
+    import networkx as nx  # seulement pour l'affichage des solutions
+except ImportError:
+    nx = None
+
+def read_file_col(file_path, use_cache=True):
+    # Lire le fichier de description du graphe (format DIMACS) et construire le graphe sous forme de tableaux NumPy
+    # Le graphe est mis en cache dans un fichier .npz à côté de l'instance (voir graph.load_col)
+    graph = load_col(file_path, use_cache=use_cache)
+    print("nb vertices:", graph.number_of_nodes())
     return graph
 
 class COLORING(CSP):
-    def __init__(self, file_path, nb_colors, var_heuristic="static", val_heuristic="static"):
+    def __init__(self, file_path, nb_colors, var_heuristic="static", val_heuristic="static", backend="python", budget=None):
         # Initialisation du problème de coloration en lisant le graphe et en définissant les contraintes
-        self.graph = read_file_col(file_path)
+        # file_path : chemin du fichier .col, ou graphe déjà chargé (ArrayGraph) pour éviter de relire le fichier
+        # budget : budget.Budget limitant aussi la génération des contraintes (BudgetExceeded s'il est épuisé)
+        time_start = time.perf_counter()
+        self.graph = file_path if isinstance(file_path, ArrayGraph) else read_file_col(file_path)
+        self.file_path = None if isinstance(file_path, ArrayGraph) else os.path.abspath(file_path)
         print(self.graph)
         self.nb_colors = nb_colors
         variables = list(self.graph.nodes())
         domains = {var: list(range(nb_colors)) for var in variables}  # Chaque variable a un domaine de couleurs
         self.var_to_index = {var: i for i, var in enumerate(variables)}
-        constraints = self.generate_constraints()  # Générer les contraintes de coloration
-        super().__init__(variables, domains, constraints, var_heuristic, val_heuristic)
+        constraints = self.generate_constraints(budget)  # Générer les contraintes de coloration
+        super().__init__(variables, domains, constraints, var_heuristic, val_heuristic, backend, budget)
+        self.interchangeable_values = True  # les couleurs sont interchangeables
+        self.build_time = time.perf_counter() - time_start  # lecture du graphe comprise
     
-    def generate_constraints(self):
+    def generate_constraints(self, budget=None):
         # Générer les contraintes de non-adjacence pour la coloration du graphe
-        constraints = [[None for _ in range(len(self.graph.nodes()))] for _ in range(len(self.graph.nodes()))]
-        for edge in self.graph.edges():
-            vertex_1, vertex_2 = edge
-            ind_vertex_1 = self.var_to_index[vertex_1]
-            ind_vertex_2 = self.var_to_index[vertex_2]
-            possible_color_v_1 = []
-            possible_color_v_2 = []
-            for color_1 in range(self.nb_colors):
-                for color_2 in range(self.nb_colors):
-                    if color_1 != color_2:  # Les sommets adjacents ne doivent pas avoir la même couleur
-                        possible_color_v_1.append((color_1, color_2))
-                        possible_color_v_2.append((color_2, color_1))
-            constraints[ind_vertex_1][ind_vertex_2] = possible_color_v_1
-            constraints[ind_vertex_2][ind_vertex_1] = possible_color_v_2
+        constraints = [{} for _ in range(len(self.graph.nodes()))]  # Listes d'adjacence : indice du voisin -> contrainte
+        # Les variables sont les sommets dans l'ordre du graphe : l'indice d'un sommet est directement celui de sa variable
+        different = NotEqual()  # relation unique partagée par tous les arcs
+        for count, (ind_vertex_1, ind_vertex_2) in enumerate(self.graph.edge_indices()):
+            if budget is not None and count & 0xfff == 0:
+                budget.check()
+            # Les sommets adjacents ne doivent pas avoir la même couleur
+            constraints[ind_vertex_1][ind_vertex_2] = different
+            constraints[ind_vertex_2][ind_vertex_1] = different
         return constraints
     
     def display_sol(self, solution):
-        # Afficher la solution de la coloration du graphe
-        G = self.graph
+        # Afficher la solution de la coloration du graphe (nécessite networkx)
+        if nx is None:
+            raise ImportError("networkx est nécessaire pour afficher la solution.")
+        G = self.graph.to_networkx()
         node_colors = solution
 
         # Nombre unique de couleurs nécessaires
@@ -77,17 +83,49 @@ class COLORING(CSP):
         plt.show()
     
     def is_feasible(self, solution):
-        # Vérifier si une solution donnée est faisable (i.e., aucun sommet adjacent n'a la même couleur)
-        for edge in self.graph.edges():
-            vertex_1, vertex_2 = edge
-            if solution[vertex_1] == solution[vertex_2]:
+        # Vérifier si une solution donnée est faisable : chaque sommet a une couleur entre 0 et nb_colors - 1 prise dans son
+        # domaine, et aucun sommet adjacent n'a la même couleur
+        labels = self.graph.label_list
+        if not isinstance(solution, dict) or len(solution) != len(labels):
+            return False
+        for vertex in labels:
+            color = solution.get(vertex)
+            if not isinstance(color, (int, np.integer)) or not 0 <= color < self.nb_colors or not self.domains.contains(vertex, color):
+                return False
+        for ind_vertex_1, ind_vertex_2 in self.graph.edge_indices():
+            if solution[labels[ind_vertex_1]] == solution[labels[ind_vertex_2]]:
                 return False
         return True
+
+    def graph_fingerprint(self):
+        # Empreinte du graphe (tableaux NumPy, relus par load_col quand le fichier change), sans parcourir les contraintes
+        digest = hashlib.sha256()
+        for array in (self.graph.labels, self.graph.indptr, self.graph.indices):
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    def fingerprint(self):
+        return f"COLORING {self.nb_colors} {self.graph_fingerprint()}"
+
+    def source(self):
+        return None if self.file_path is None else (self.file_path, self.graph_fingerprint())
+
+    def reduce_colors(self, nb_colors):
+        # Passer à nb_colors couleurs (au plus le nombre actuel) en retirant sur place les couleurs nb_colors, nb_colors + 1, ...
+        # des domaines (retraits journalisés, annulables par domains.undo) : le modèle (variables, contraintes, tables des
+        # domaines) est conservé tel quel
+        if nb_colors > self.nb_colors:
+            raise ValueError("Le nombre de couleurs ne peut que diminuer.")
+        kept = (1 << nb_colors) - 1  # les couleurs 0..nb_colors-1 occupent les bits de poids faible
+        for var in self.variables:
+            self.domains.restrict(var, kept)
+        self.nb_colors = nb_colors
     
 
 class SMALL_COLORING(CSP):
-    def __init__(self, edges, nb_colors):
+    def __init__(self, edges, nb_colors, backend="python"):
         # Initialiser un petit problème de coloration avec une liste d'arêtes spécifiée
+        time_start = time.perf_counter()
         self.nb_colors = nb_colors
         self.variables = []
         for x, y in edges:
@@ -98,32 +136,150 @@ class SMALL_COLORING(CSP):
         domains = {var: list(range(nb_colors)) for var in self.variables}
         self.var_to_index = {var: i for i, var in enumerate(self.variables)}
         constraints = self.generate_constraints(edges)
-        super().__init__(self.variables, domains, constraints)
+        super().__init__(self.variables, domains, constraints, backend=backend)
+        self.interchangeable_values = True
+        self.build_time = time.perf_counter() - time_start
 
     def generate_constraints(self, edges):
         # Générer les contraintes de non-adjacence pour la coloration du graphe
-        constraints = [[None for _ in range(len(self.variables))] for _ in range(len(self.variables))]
+        constraints = [{} for _ in range(len(self.variables))]  # Listes d'adjacence : indice du voisin -> contrainte
+        different = NotEqual()  # relation unique partagée par tous les arcs
         for edge in edges:
             vertex_1, vertex_2 = edge
             ind_vertex_1 = self.var_to_index[vertex_1]
             ind_vertex_2 = self.var_to_index[vertex_2]
-            possible_color_v_1 = []
-            possible_color_v_2 = []
-            for color_1 in range(self.nb_colors):
-                for color_2 in range(self.nb_colors):
-                    if color_1 != color_2:  # Les sommets adjacents ne doivent pas avoir la même couleur
-                        possible_color_v_1.append((color_1, color_2))
-                        possible_color_v_2.append((color_2, color_1))
-            constraints[ind_vertex_1][ind_vertex_2] = possible_color_v_1
-            constraints[ind_vertex_2][ind_vertex_1] = possible_color_v_2
+            # Les sommets adjacents ne doivent pas avoir la même couleur
+            constraints[ind_vertex_1][ind_vertex_2] = different
+            constraints[ind_vertex_2][ind_vertex_1] = different
 
         return constraints
     
 
-def dichotomic_search(file_path, use_ac3=True, fc=False, var_heuristic="static", val_heuristic="static", time_limit=20):
+def color_component(graph, nb_colors, engine="csp", var_heuristic="static", val_heuristic="static", budget=None, **options):
+    # Colorer un graphe (une composante) avec nb_colors couleurs avec le moteur "csp" (options : options de solve()) ou "dsatur"
+    # Retourne (coloration {sommet: couleur}, "No solution found" ou Timeout, dictionnaire des statistiques)
+    budget = as_budget(budget)
+    if engine == "dsatur":
+        solver = DSATUR(graph)
+        return solver.solve(nb_colors, budget=budget), solver.stats
+    if engine != "csp":
+        raise ValueError("Moteur non reconnu. Choisissez entre 'csp' ou 'dsatur'.")
+    try:
+        csp = COLORING(graph, nb_colors, var_heuristic, val_heuristic, budget=budget)
+    except BudgetExceeded as error:
+        return Timeout(error.reason), None
+    return csp.solve(budget=budget, **options), csp.stats.as_dict()
+
+
+def _component_worker(graph, nb_colors, engine, var_heuristic, val_heuristic, budget, options, connection):
+    # Processus fils : colorer une composante et renvoyer (statut, résultat, statistiques) au processus principal
+    try:
+        sys.stdout = open(os.devnull, 'w')
+        connection.send(("done",) + color_component(graph, nb_colors, engine, var_heuristic, val_heuristic, budget, **options))
+    except Exception as error:
+        connection.send(("error", repr(error), None))
+    finally:
+        connection.close()
+
+
+def reduced_coloring(file_path, nb_colors, engine="csp", var_heuristic="static", val_heuristic="static", processes=None,
+                     time_limit=None, budget=None, return_stats=False, **options):
+    # Colorer un graphe avec nb_colors couleurs après un prétraitement qui réduit la recherche :
+    # - les sommets de degré < nb_colors sont retirés itérativement (graph.k_core) : ils seront toujours colorables à la fin
+    # - le reste (k-cœur) est découpé en composantes connexes, colorées indépendamment (color_component), les plus grandes
+    #   d'abord ; processes : nombre de processus entre lesquels les composantes sont réparties (None : dans ce processus)
+    # - les sommets retirés sont recolorés dans l'ordre inverse du retrait avec la plus petite couleur libre parmi leurs voisins
+    # file_path : chemin du fichier .col ou graphe déjà chargé (ArrayGraph) ; options : options de solve() (moteur "csp")
+    # Retourne la coloration {sommet: couleur}, "No solution found" (une composante n'est pas colorable) ou un Timeout
+    # (composantes déjà colorées et coloration partielle de celle qui a été interrompue) ; avec return_stats,
+    # (résultat, statistiques cumulées des composantes)
+    budget = as_budget(budget, time_limit)
+    graph = file_path if isinstance(file_path, ArrayGraph) else read_file_col(file_path)
+    stats = SolveStats()
+    phase_start = time.perf_counter()
+    core, peeled = graph.k_core(nb_colors)
+    components = sorted(graph.connected_components(core), key=len, reverse=True)
+    stats.preprocessing_time = time.perf_counter() - phase_start
+    stats.search = {"core_size": len(core), "peeled": len(peeled), "components": len(components)}
+    subgraphs = [graph.subgraph(component) for component in components]
+
+    phase_start = time.perf_counter()
+    solution = {}
+    result = None  # premier résultat non concluant ("No solution found" ou Timeout)
+    if processes is None:
+        for subgraph in subgraphs:
+            sol, component_stats = color_component(subgraph, nb_colors, engine, var_heuristic, val_heuristic, budget, **options)
+            if component_stats is not None:
+                stats.merge(component_stats)
+            if not isinstance(sol, dict):
+                result = sol
+                break
+            solution.update(sol)
+    else:
+        context = multiprocessing.get_context()
+        pending = list(subgraphs)
+        running = {}  # extrémité du tube côté processus principal -> processus
+        try:
+            while (pending or running) and result is None:
+                while pending and len(running) < processes:
+                    reader, writer = context.Pipe(duplex=False)
+                    process = context.Process(target=_component_worker, daemon=True,
+                                              args=(pending.pop(0), nb_colors, engine, var_heuristic, val_heuristic, budget.child(), options, writer))
+                    process.start()
+                    writer.close()
+                    running[reader] = process
+                # Attente par tranches courtes pour voir une annulation ou l'épuisement du budget
+                if budget.exhausted():
+                    result = Timeout(budget.reason)
+                    break
+                for reader in wait(list(running), timeout=0.1):
+                    try:
+                        status, sol, component_stats = reader.recv()
+                    except EOFError:
+                        status, sol, component_stats = "error", "worker exited without a result", None
+                    running.pop(reader).join()
+                    reader.close()
+                    if status == "error":
+                        raise RuntimeError(f"Échec de la coloration d'une composante : {sol}")
+                    if component_stats is not None:
+                        stats.merge(component_stats)
+                        budget.nodes += component_stats["nodes"]
+                    if not isinstance(sol, dict):
+                        result = sol
+                        break
+                    solution.update(sol)
+        finally:
+            for reader, process in running.items():
+                process.kill()
+                process.join()
+                reader.close()
+    stats.search_time = time.perf_counter() - phase_start
+
+    if result is None:
+        # Réinsertion des sommets retirés : chacun a moins de nb_colors voisins déjà colorés
+        labels = graph.label_list
+        adjacency = graph.adjacency_lists()
+        colors = [None] * len(labels)
+        for vertex in core:
+            colors[vertex] = solution[labels[vertex]]
+        for vertex in reversed(peeled):
+            used = {colors[other] for other in adjacency[vertex]}
+            colors[vertex] = next(color for color in range(nb_colors) if color not in used)
+        result = {label: colors[vertex] for vertex, label in enumerate(labels)}
+    elif isinstance(result, Timeout):
+        result.partial = {**solution, **result.partial}
+    return (result, stats) if return_stats else result
+
+
+def dichotomic_search(file_path, use_ac3=True, fc=False, var_heuristic="static", val_heuristic="static", time_limit=20, parallel=None, engine="csp", cache=None, preprocess=False):
     # Effectuer une recherche dichotomique pour trouver le nombre minimal de couleurs nécessaires
-    graph = read_file_col(file_path)
-    nb_max_colors = len(graph.nodes())
+    # parallel : nombre de processus entre lesquels chaque recherche est découpée (utile pour les preuves d'infaisabilité)
+    # engine : "csp" (modèle CSP générique) ou "dsatur" (moteur de coloration dédié) pour chaque test de k
+    # cache : result_cache.ResultCache, pour ne pas refaire les tests de k déjà faits par une recherche précédente (moteur "csp")
+    # preprocess : tester chaque k avec reduced_coloring (retrait des sommets de degré < k, composantes connexes séparées),
+    # parallel étant alors le nombre de processus entre lesquels les composantes sont réparties
+    instance_graph = read_file_col(file_path)  # lu une seule fois pour toutes les valeurs de k essayées
+    nb_max_colors = len(instance_graph.nodes())
     nb_min_colors = 1
     nb_colors = (nb_max_colors + nb_min_colors) // 2
     
@@ -131,12 +287,117 @@ def dichotomic_search(file_path, use_ac3=True, fc=False, var_heuristic="static",
         print("nb_min_colors", nb_min_colors)
         print("nb_max_colors", nb_max_colors)
         print("nb_colors", nb_colors)
-        graph = COLORING(file_path, nb_colors, var_heuristic, val_heuristic)
-        sol = graph.solve(use_ac3=use_ac3, fc=fc, time_limit=time_limit)  # Résoudre le problème avec le nombre actuel de couleurs
-        if sol == "No solution found":
-            nb_min_colors = nb_colors  # Pas de solution trouvée, augmenter le nombre minimum de couleurs
+        if preprocess:
+            sol = reduced_coloring(instance_graph, nb_colors, engine, var_heuristic, val_heuristic, processes=parallel, time_limit=time_limit,
+                                   use_ac3=use_ac3, fc=fc)
+        elif engine == "dsatur":
+            sol = DSATUR(instance_graph).solve(nb_colors, time_limit=time_limit)
+        else:
+            graph = COLORING(instance_graph, nb_colors, var_heuristic, val_heuristic)
+            sol = graph.solve(use_ac3=use_ac3, fc=fc, time_limit=time_limit, parallel=parallel, cache=cache)  # Résoudre le problème avec le nombre actuel de couleurs
+        if not isinstance(sol, dict):
+            nb_min_colors = nb_colors  # Pas de solution trouvée (ou limite de temps atteinte), augmenter le nombre minimum de couleurs
         else:
             nb_max_colors = nb_colors  # Solution trouvée, réduire le nombre maximum de couleurs
         nb_colors = (nb_max_colors + nb_min_colors) // 2
         
     return nb_max_colors  # Retourner le nombre minimal de couleurs trouvées
+
+
+def greedy_coloring(graph):
+    # Coloration gloutonne "plus grand degré d'abord" : chaque sommet reçoit la plus petite couleur absente de ses voisins
+    # Le nombre de couleurs utilisées est une borne supérieure du nombre chromatique.
+    # Retourne la liste des couleurs (par indice de sommet)
+    adjacency = graph.adjacency_lists()
+    colors = [-1] * len(adjacency)
+    for vertex in sorted(range(len(adjacency)), key=lambda v: -len(adjacency[v])):
+        used = {colors[other] for other in adjacency[vertex]}
+        color = 0
+        while color in used:
+            color += 1
+        colors[vertex] = color
+    return colors
+
+
+def repair_coloring(adjacency, colors, nb_colors):
+    # Adapter une coloration à nb_colors couleurs : les sommets de couleur >= nb_colors reçoivent la plus petite couleur
+    # autorisée absente de leurs voisins ; ceux qui n'en ont pas restent non colorés (None)
+    # Retourne (couleurs, nombre de sommets non colorés)
+    colors = [color if color < nb_colors else None for color in colors]
+    uncolored = 0
+    for vertex, color in enumerate(colors):
+        if color is None:
+            used = {colors[other] for other in adjacency[vertex]}
+            color = next((c for c in range(nb_colors) if c not in used), None)
+            colors[vertex] = color
+            uncolored += color is None
+    return colors, uncolored
+
+
+def chromatic_number(file_path, use_ac3=True, fc=False, var_heuristic="static", val_heuristic="static", time_limit=20, parallel=None, engine="csp", budget=None,
+                     return_stats=False, **options):
+    # Calculer le nombre chromatique en construisant le modèle une seule fois :
+    # - borne inférieure : taille d'une clique gloutonne ; borne supérieure : coloration gloutonne DSATUR
+    # - on descend ensuite k depuis la borne supérieure : les domaines sont réduits sur place (reduce_colors), la dernière
+    #   coloration trouvée est réparée gloutonnement pour k couleurs, et si ce n'est pas suffisant elle sert de point de
+    #   départ à la recherche (warm_start) ; on s'arrête à la borne inférieure ou au premier k sans solution.
+    # file_path : chemin du fichier .col ou graphe déjà chargé (ArrayGraph)
+    # time_limit : limite de temps totale ; budget : budget.Budget partagé par toutes les étapes, à la place de time_limit
+    # options : autres options de solve()
+    # engine : "csp" (modèle CSP générique, démarche ci-dessus) ou "dsatur" (séparation et évaluation DSATUR entre les deux bornes)
+    # Retourne (nombre de couleurs, coloration {sommet: couleur}, True si l'optimalité est prouvée) : si le budget est
+    # épuisé, la meilleure coloration trouvée jusque-là est retournée (non prouvée) ; avec return_stats,
+    # (nombre de couleurs, coloration, preuve, statistiques) où stats.search contient les bornes initiales
+    # ("lower_bound" : clique gloutonne, "upper_bound" : DSATUR glouton)
+    budget = as_budget(budget, time_limit)
+    graph = file_path if isinstance(file_path, ArrayGraph) else read_file_col(file_path)
+    labels = graph.nodes()
+    stats = SolveStats()
+    if not labels:
+        stats.search = {"lower_bound": 0, "upper_bound": 0}
+        return (0, {}, True, stats) if return_stats else (0, {}, True)
+    adjacency = graph.adjacency_lists()
+    colors = dsatur_greedy(adjacency)
+    nb_colors = max(colors) + 1
+    clique = greedy_clique(graph, target=nb_colors)
+    lower_bound = len(clique)
+    stats.search = {"lower_bound": lower_bound, "upper_bound": nb_colors}
+    if engine == "dsatur":
+        solver = DSATUR(graph)
+        solution = solver.solve(upper_bound=nb_colors, clique=clique, budget=budget)
+        if not isinstance(solution, dict):
+            # aucune coloration complète dans le budget : celle de DSATUR glouton reste valable
+            result = nb_colors, {label: colors[vertex] for vertex, label in enumerate(labels)}, False
+        else:
+            result = solver.nb_colors, solution, solver.proven
+        return result + (stats,) if return_stats else result
+    if engine != "csp":
+        raise ValueError("Moteur non reconnu. Choisissez entre 'csp' ou 'dsatur'.")
+    csp = None
+    proven = True
+    while nb_colors > lower_bound:
+        k = nb_colors - 1
+        repaired, uncolored = repair_coloring(adjacency, colors, k)
+        if uncolored == 0:
+            colors, nb_colors = repaired, k  # la réparation gloutonne suffit, pas de recherche
+            continue
+        try:
+            if csp is None:
+                csp = COLORING(graph, k, var_heuristic, val_heuristic, budget=budget)  # modèle construit à la première recherche seulement
+            else:
+                csp.reduce_colors(k)
+        except BudgetExceeded:
+            proven = False
+            break
+        if budget.exhausted():
+            proven = False
+            break
+        warm_start = {labels[vertex]: color for vertex, color in enumerate(repaired) if color is not None}
+        sol = csp.solve(use_ac3=use_ac3, fc=fc, budget=budget, parallel=parallel, warm_start=warm_start, **options)
+        stats.merge(csp.stats)
+        if not isinstance(sol, dict):
+            proven = sol == "No solution found"  # sinon Timeout : budget épuisé
+            break
+        colors, nb_colors = [sol[label] for label in labels], k
+    result = nb_colors, {label: colors[vertex] for vertex, label in enumerate(labels)}, proven
+    return result + (stats,) if return_stats else result
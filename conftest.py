@@ -0,0 +1,2 @@
+# Scripts de démonstration à la racine (affichages, fenêtres matplotlib) : ce ne sont pas des tests pytest
+collect_ignore = ["test.py", "test_coloring.py"]
@@ -0,0 +1,192 @@
+import weakref
+import numpy as np
+
+
+class Constraint:
+    # Contrainte binaire en intension : on teste la compatibilité d'un couple (a, b) au lieu de stocker la liste des couples autorisés
+    # Les relations sont immuables et internées (NotEqual, QueensConstraint, Table) : tous les arcs de même sémantique
+    # partagent le même objet, de taille fixe (__slots__), et la transposée d'une relation non symétrique est une vue
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Les contraintes sont immuables (elles sont partagées entre les arcs).")
+
+    def check(self, a, b):
+        raise NotImplementedError
+
+    def transpose(self):
+        # Contrainte équivalente vue depuis l'autre variable : (b, a) autorisé si et seulement si (a, b) l'est
+        raise NotImplementedError
+
+    def signature(self):
+        # Clé identifiant la relation : deux contraintes de même signature autorisent les mêmes couples
+        # (par défaut la contrainte elle-même, c'est-à-dire son identité)
+        return self
+
+    def compatibility(self, values_x, values_y):
+        # Matrice booléenne de compatibilité : case (i, j) vraie si (values_x[i], values_y[j]) est autorisé
+        return np.array([[self.check(a, b) for b in values_y] for a in values_x], dtype=bool).reshape(len(values_x), len(values_y))
+
+    def __contains__(self, pair):
+        # Compatibilité avec l'ancienne écriture `(a, b) in contrainte`
+        return self.check(pair[0], pair[1])
+
+
+class NotEqual(Constraint):
+    # Les deux variables doivent prendre des valeurs différentes (coloration de graphe) ; un seul objet pour tous les arcs
+    __slots__ = ()
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __reduce__(self):
+        return NotEqual, ()
+
+    def check(self, a, b):
+        return a != b
+
+    def transpose(self):
+        return self
+
+    def signature(self):
+        return ("NotEqual",)
+
+    def compatibility(self, values_x, values_y):
+        vx, vy = np.asarray(values_x), np.asarray(values_y)
+        if vx.ndim == 1 and vy.ndim == 1 and vx.dtype.kind in "biuf" and vy.dtype.kind in "biuf":
+            return vx[:, None] != vy[None, :]  # valeurs numériques : comparaison vectorisée
+        return super().compatibility(values_x, values_y)
+
+    def __repr__(self):
+        return "NotEqual()"
+
+
+class QueensConstraint(Constraint):
+    # Deux dames placées sur des lignes à distance `distance` ne doivent partager ni colonne ni diagonale
+    # La relation ne dépend que de la distance : un seul objet par distance, partagé par tous les couples de lignes
+    __slots__ = ("distance",)
+    _interned = {}
+
+    def __new__(cls, distance):
+        constraint = cls._interned.get(distance)
+        if constraint is None:
+            constraint = super().__new__(cls)
+            object.__setattr__(constraint, "distance", distance)
+            cls._interned[distance] = constraint
+        return constraint
+
+    def __reduce__(self):
+        return QueensConstraint, (self.distance,)
+
+    def check(self, a, b):
+        return a != b and abs(a - b) != self.distance
+
+    def transpose(self):
+        return self
+
+    def signature(self):
+        return ("Queens", self.distance)
+
+    def compatibility(self, values_x, values_y):
+        difference = np.subtract.outer(np.asarray(values_x), np.asarray(values_y))
+        return (difference != 0) & (np.abs(difference) != self.distance)
+
+    def __repr__(self):
+        return f"QueensConstraint({self.distance})"
+
+
+class Predicate(Constraint):
+    # Contrainte définie par une fonction quelconque f(a, b) -> bool
+    __slots__ = ("func", "name")
+
+    def __init__(self, func, name=None):
+        object.__setattr__(self, "func", func)
+        object.__setattr__(self, "name", name if name is not None else getattr(func, "__name__", "predicate"))
+
+    def check(self, a, b):
+        return self.func(a, b)
+
+    def transpose(self):
+        return Transposed(self)
+
+    def __repr__(self):
+        return f"Predicate({self.name})"
+
+
+class Table(Constraint):
+    # Contrainte en extension compilée en ensemble de couples autorisés : test d'appartenance en O(1)
+    # Les tables de mêmes couples sont internées (tant qu'une contrainte les utilise) : un seul ensemble en mémoire
+    __slots__ = ("allowed", "__weakref__")
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, pairs):
+        allowed = frozenset(pairs)
+        constraint = cls._interned.get(allowed)
+        if constraint is None:
+            constraint = super().__new__(cls)
+            object.__setattr__(constraint, "allowed", allowed)
+            cls._interned[allowed] = constraint
+        return constraint
+
+    def __reduce__(self):
+        return Table, (self.allowed,)
+
+    def check(self, a, b):
+        return (a, b) in self.allowed
+
+    def transpose(self):
+        return Transposed(self)
+
+    def signature(self):
+        return ("Table", self.allowed)
+
+    def __iter__(self):
+        return iter(self.allowed)
+
+    def __len__(self):
+        return len(self.allowed)
+
+    def __repr__(self):
+        return f"Table({sorted(self.allowed)})"
+
+
+class Transposed(Constraint):
+    # Vue transposée d'une contrainte non symétrique : (a, b) est autorisé si (b, a) l'est pour la contrainte d'origine,
+    # sans copier sa relation
+    __slots__ = ("constraint",)
+
+    def __new__(cls, constraint):
+        view = super().__new__(cls)
+        object.__setattr__(view, "constraint", constraint)
+        return view
+
+    def __reduce__(self):
+        return Transposed, (self.constraint,)
+
+    def check(self, a, b):
+        return self.constraint.check(b, a)
+
+    def transpose(self):
+        return self.constraint
+
+    def signature(self):
+        signature = self.constraint.signature()
+        return self if signature is self.constraint else ("Transposed", signature)
+
+    def compatibility(self, values_x, values_y):
+        return self.constraint.compatibility(values_y, values_x).T
+
+    def __repr__(self):
+        return f"Transposed({self.constraint!r})"
+
+
+def as_constraint(constraint):
+    # Convertir une contrainte donnée sous une forme quelconque (liste de couples, fonction, Constraint ou None)
+    if constraint is None or isinstance(constraint, Constraint):
+        return constraint
+    if callable(constraint):
+        return Predicate(constraint)
+    return Table(constraint)
@@ -0,0 +1,121 @@
+class Domains:
+    # Stockage des domaines : chaque domaine est un masque de bits (entier Python) sur les valeurs initiales de la variable.
+    # Les entiers Python étant de taille arbitraire, le même stockage convient aux grands domaines.
+    def __init__(self, domains):
+        # domains : dictionnaire variable -> liste des valeurs initiales
+        self.values = {}  # valeur associée à chaque position de bit
+        self.bit_of = {}  # bit associé à chaque valeur
+        self.masks = {}  # masque courant de chaque variable
+        self.trail = []  # journal des modifications (variable, ancien masque) pour annuler au retour arrière
+        shared = {}  # les variables ayant le même domaine initial partagent les mêmes tables
+        for var, vals in domains.items():
+            key = tuple(vals)
+            if key not in shared:
+                shared[key] = (list(key), {val: 1 << i for i, val in enumerate(key)})
+            self.values[var], self.bit_of[var] = shared[key]
+            self.masks[var] = (1 << len(key)) - 1
+
+    def copy(self):
+        # Copie légère : seules les masques sont copiés, les tables de valeurs sont partagées
+        new = Domains.__new__(Domains)
+        new.values = self.values
+        new.bit_of = self.bit_of
+        new.masks = self.masks.copy()
+        new.trail = []
+        return new
+
+    def __getitem__(self, var):
+        # Liste des valeurs encore présentes dans le domaine (dans l'ordre initial)
+        return list(self.iter_values(var))
+
+    def __setitem__(self, var, values):
+        # Restreindre le domaine aux valeurs données (qui doivent appartenir au domaine initial)
+        bit_of = self.bit_of[var]
+        mask = 0
+        for value in values:
+            mask |= bit_of[value]
+        self.trail.append((var, self.masks[var]))
+        self.masks[var] = mask
+
+    def __contains__(self, var):
+        return var in self.masks
+
+    def __iter__(self):
+        return iter(self.masks)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def __repr__(self):
+        return repr({var: self[var] for var in self.masks})
+
+    def keys(self):
+        return self.masks.keys()
+
+    def items(self):
+        return ((var, self[var]) for var in self.masks)
+
+    def iter_values(self, var):
+        # Parcourir les valeurs présentes en extrayant les bits de poids faible un par un
+        mask = self.masks[var]
+        values = self.values[var]
+        while mask:
+            low = mask & -mask
+            yield values[low.bit_length() - 1]
+            mask ^= low
+
+    def contains(self, var, value):
+        # Vérifier en O(1) si la valeur appartient au domaine de la variable
+        return bool(self.masks[var] & self.bit_of[var].get(value, 0))
+
+    def remove(self, var, value):
+        # Retirer une valeur du domaine, retourne True si elle était présente
+        bit = self.bit_of[var].get(value, 0)
+        mask = self.masks[var]
+        if mask & bit:
+            self.trail.append((var, mask))
+            self.masks[var] = mask ^ bit
+            return True
+        return False
+
+    def restrict(self, var, mask):
+        # Intersecter le domaine avec un masque de bits (une seule entrée de journal), retourne True s'il a changé
+        old = self.masks[var]
+        new = old & mask
+        if new != old:
+            self.trail.append((var, old))
+            self.masks[var] = new
+            return True
+        return False
+
+    def assign(self, var, value):
+        # Réduire le domaine à la seule valeur donnée
+        mask = self.masks[var]
+        self.trail.append((var, mask))
+        self.masks[var] = mask & self.bit_of[var].get(value, 0)
+
+    def mark(self):
+        # Position courante du journal, à passer à undo pour revenir à l'état actuel
+        return len(self.trail)
+
+    def undo(self, mark):
+        # Annuler toutes les modifications enregistrées depuis mark, dans l'ordre inverse
+        trail = self.trail
+        masks = self.masks
+        while len(trail) > mark:
+            var, mask = trail.pop()
+            masks[var] = mask
+
+    def size(self, var):
+        # Nombre de valeurs restantes dans le domaine
+        return bin(self.masks[var]).count("1")
+
+    def is_empty(self, var):
+        return self.masks[var] == 0
+
+    def first(self, var):
+        # Plus petite valeur (dans l'ordre initial) encore présente, None si le domaine est vide
+        mask = self.masks[var]
+        if mask == 0:
+            return None
+        return self.values[var][(mask & -mask).bit_length() - 1]
@@ -0,0 +1,248 @@
+from graph import ArrayGraph, load_col
+from budget import Timeout, as_budget
+
+
+def greedy_clique(graph, target=None):
+    # Clique construite gloutonnement depuis chaque sommet : on ajoute tant que possible le candidat (voisin de tous les
+    # sommets de la clique) qui a le plus de voisins parmi les candidats. Sa taille est une borne inférieure du nombre
+    # chromatique. Les ensembles de candidats sont des masques de bits pour que les intersections soient rapides.
+    # target : arrêter dès qu'une clique de cette taille est trouvée (par exemple la borne supérieure connue)
+    # Retourne la plus grande clique trouvée (liste d'indices de sommets)
+    adjacency = graph.adjacency_lists()
+    bits = [sum(1 << other for other in neighbors) for neighbors in adjacency]
+    best = []
+    for start in sorted(range(len(adjacency)), key=lambda v: -len(adjacency[v])):
+        if len(adjacency[start]) < len(best):
+            break  # un sommet de degré d ne peut pas être dans une clique de plus de d + 1 sommets
+        clique = [start]
+        candidates = bits[start]
+        while candidates:
+            vertex, best_count = -1, -1
+            remaining = candidates
+            while remaining:
+                low = remaining & -remaining
+                other = low.bit_length() - 1
+                count = bin(bits[other] & candidates).count("1")
+                if count > best_count:
+                    vertex, best_count = other, count
+                remaining ^= low
+            clique.append(vertex)
+            candidates &= bits[vertex]
+        if len(clique) > len(best):
+            best = clique
+            if target is not None and len(best) >= target:
+                break
+    return best
+
+
+def dsatur_greedy(graph):
+    # Coloration gloutonne DSATUR : on colore à chaque étape le sommet non coloré ayant le plus de couleurs différentes
+    # dans son voisinage (degré de saturation), à égalité celui qui a le plus de voisins non colorés, avec la plus petite
+    # couleur disponible. La saturation de chaque sommet est un masque de bits des couleurs de ses voisins.
+    # Retourne la liste des couleurs (par indice de sommet)
+    adjacency = graph.adjacency_lists() if isinstance(graph, ArrayGraph) else graph
+    n = len(adjacency)
+    colors = [-1] * n
+    saturation = [0] * n  # masque des couleurs présentes chez les voisins
+    saturation_size = [0] * n
+    uncolored_degree = [len(neighbors) for neighbors in adjacency]
+    uncolored = set(range(n))
+    while uncolored:
+        vertex = max(uncolored, key=lambda v: (saturation_size[v], uncolored_degree[v], -v))
+        uncolored.discard(vertex)
+        free = ~saturation[vertex]
+        color = (free & -free).bit_length() - 1  # plus petite couleur absente du voisinage
+        colors[vertex] = color
+        bit = 1 << color
+        for other in adjacency[vertex]:
+            uncolored_degree[other] -= 1
+            if not saturation[other] & bit:
+                saturation[other] |= bit
+                saturation_size[other] += 1
+    return colors
+
+
+class DSATUR:
+    # Moteur de coloration dédié : DSATUR en séparation et évaluation (branch and bound), sans passer par le modèle CSP générique.
+    # Chaque sommet garde le nombre de ses voisins de chaque couleur ; la saturation (masque de bits des couleurs voisines)
+    # et le nombre de voisins non colorés sont mis à jour incrémentalement à chaque coloration et à chaque retour arrière.
+    # La recherche est itérative (pile explicite) comme la recherche générique.
+    def __init__(self, graph):
+        # graph : chemin d'un fichier .col ou graphe déjà chargé (ArrayGraph)
+        self.graph = graph if isinstance(graph, ArrayGraph) else load_col(graph)
+        self.labels = self.graph.nodes()
+        self.adjacency = self.graph.adjacency_lists()
+        self.stats = {"nodes": 0, "backtracks": 0}
+        self.nb_colors = None  # nombre de couleurs de la meilleure coloration trouvée
+        self.proven = False  # True si la dernière résolution a prouvé son résultat (optimalité ou infaisabilité)
+        self.timed_out = False
+        self.timeout_reason = None
+        self.best_partial = []  # coloration partielle la plus profonde atteinte (liste par indice, -1 : non coloré)
+
+    def greedy(self):
+        # Coloration gloutonne DSATUR (liste des couleurs par indice de sommet)
+        return dsatur_greedy(self.adjacency)
+
+    def to_solution(self, colors):
+        # Coloration {sommet: couleur} à partir de la liste des couleurs par indice
+        return {label: colors[vertex] for vertex, label in enumerate(self.labels)}
+
+    def branch_and_bound(self, upper_bound, lower_bound=0, clique=(), first_only=False, budget=None):
+        # Chercher une coloration avec moins de upper_bound couleurs.
+        # lower_bound : on s'arrête dès qu'une coloration de cette taille est trouvée (optimale)
+        # clique : sommets deux à deux adjacents, colorés d'avance 0, 1, 2, ... (brise les symétries entre couleurs)
+        # first_only : s'arrêter à la première coloration trouvée (test de faisabilité), sinon minimiser
+        # budget : budget.Budget (temps, nœuds, mémoire, annulation), None pour une recherche sans limite
+        # Retourne la meilleure coloration trouvée (liste par indice) ou None ; self.timed_out si le budget a coupé la recherche,
+        # self.best_partial est alors la coloration partielle la plus profonde atteinte
+        adjacency = self.adjacency
+        n = len(adjacency)
+        best = upper_bound  # on cherche strictement moins de best couleurs
+        best_colors = None
+        colors = [-1] * n
+        counts = [[0] * max(upper_bound, 1) for _ in range(n)]  # nombre de voisins de chaque couleur
+        saturation = [0] * n
+        saturation_size = [0] * n
+        uncolored_degree = [len(neighbors) for neighbors in adjacency]
+        uncolored = set(range(n))
+        stats = self.stats
+        self.timed_out = False
+        self.best_partial = []
+        deepest = 0  # profondeur de la coloration partielle sauvegardée
+
+        def assign(vertex, color):
+            colors[vertex] = color
+            uncolored.discard(vertex)
+            bit = 1 << color
+            for other in adjacency[vertex]:
+                uncolored_degree[other] -= 1
+                count = counts[other]
+                if count[color] == 0:
+                    saturation[other] |= bit
+                    saturation_size[other] += 1
+                count[color] += 1
+
+        def unassign(vertex):
+            color = colors[vertex]
+            colors[vertex] = -1
+            uncolored.add(vertex)
+            bit = 1 << color
+            for other in adjacency[vertex]:
+                uncolored_degree[other] += 1
+                count = counts[other]
+                count[color] -= 1
+                if count[color] == 0:
+                    saturation[other] ^= bit
+                    saturation_size[other] -= 1
+
+        if len(clique) >= best:
+            return None
+        for color, vertex in enumerate(clique):
+            assign(vertex, color)
+        used = len(clique)
+
+        stack = []  # niveaux : [sommet, couleur courante (-1 avant le premier essai), nombre de couleurs utilisées avant]
+        while True:
+            if uncolored:
+                # Nouveau niveau : sommet de saturation maximale, à égalité de plus grand degré dans le sous-graphe non coloré
+                vertex = max(uncolored, key=lambda v: (saturation_size[v], uncolored_degree[v], -v))
+                stack.append([vertex, -1, used])
+                stats["nodes"] += 1
+                if budget is not None:
+                    budget.nodes += 1
+            else:
+                # Coloration complète avec used couleurs (< best)
+                best, best_colors = used, list(colors)
+                if first_only or best <= lower_bound:
+                    break
+            # Passer à la couleur suivante du niveau le plus profond, en remontant quand il n'y en a plus
+            while stack:
+                if budget is not None and budget.exhausted():
+                    self.timed_out = True
+                    self.timeout_reason = budget.reason
+                    if len(stack) > deepest:
+                        self.best_partial = list(colors)
+                    stack = []
+                    break
+                frame = stack[-1]
+                vertex, color, used = frame
+                if color >= 0:
+                    if len(stack) > deepest:
+                        # On quitte la coloration partielle la plus profonde atteinte : la sauvegarder
+                        deepest = len(stack)
+                        self.best_partial = list(colors)
+                    unassign(vertex)
+                # Couleurs autorisées : absentes du voisinage, parmi les couleurs déjà utilisées et une seule nouvelle
+                # couleur (les nouvelles couleurs sont interchangeables), tant que le total reste < best
+                limit = min(used + 1, best - 1)
+                color += 1
+                mask = saturation[vertex]
+                while color < limit and mask >> color & 1:
+                    color += 1
+                if color < limit:
+                    frame[1] = color
+                    assign(vertex, color)
+                    used = max(used, color + 1)
+                    break
+                stack.pop()
+                stats["backtracks"] += 1
+            if not stack:
+                break
+        return best_colors
+
+    def solve(self, nb_colors=None, time_limit=None, upper_bound=None, lower_bound=None, clique=None, budget=None):
+        # Sans nb_colors : calculer le nombre chromatique (minimisation), la borne supérieure de départ est la coloration
+        # gloutonne DSATUR et la borne inférieure la taille de la clique donnée (ou trouvée gloutonnement).
+        # Avec nb_colors : chercher une coloration avec au plus nb_colors couleurs.
+        # budget : budget.Budget à la place de time_limit
+        # Retourne la coloration {sommet: couleur} (la meilleure trouvée), "No solution found" (preuve) ou, si le budget est
+        # épuisé avant toute coloration, un Timeout avec la coloration partielle la plus profonde ; self.nb_colors,
+        # self.proven et self.timed_out décrivent le résultat
+        budget = as_budget(budget, time_limit)
+        self.stats = {"nodes": 0, "backtracks": 0}
+        self.proven = False
+        self.timed_out = False
+        self.timeout_reason = None
+        if not self.labels:
+            self.nb_colors, self.proven = 0, True
+            return {}
+        greedy_colors = self.greedy()
+        greedy_nb_colors = max(greedy_colors) + 1
+        if upper_bound is None or upper_bound >= greedy_nb_colors:
+            upper_bound, best_colors = greedy_nb_colors, greedy_colors
+        else:
+            best_colors = None  # borne fournie par l'appelant sans coloration associée
+        if clique is None:
+            clique = greedy_clique(self.graph, target=upper_bound)
+        if lower_bound is None:
+            lower_bound = len(clique)
+        lower_bound = max(lower_bound, len(clique))
+
+        if nb_colors is not None:
+            if best_colors is not None and upper_bound <= nb_colors:
+                self.nb_colors, self.proven = upper_bound, True
+                return self.to_solution(best_colors)
+            if nb_colors < lower_bound:
+                self.proven = True
+                return "No solution found"
+            colors = self.branch_and_bound(nb_colors + 1, clique=clique, first_only=True, budget=budget)
+            self.proven = not self.timed_out
+            if colors is None:
+                return self.timeout() if self.timed_out else "No solution found"
+            self.nb_colors = max(colors) + 1
+            return self.to_solution(colors)
+
+        if upper_bound > lower_bound:
+            colors = self.branch_and_bound(upper_bound, lower_bound=lower_bound, clique=clique, budget=budget)
+            if colors is not None:
+                best_colors = colors
+        self.proven = not self.timed_out
+        if best_colors is None:
+            return self.timeout() if self.timed_out else "No solution found"
+        self.nb_colors = max(best_colors) + 1
+        return self.to_solution(best_colors)
+
+    def timeout(self):
+        # Résultat d'une recherche interrompue : coloration partielle la plus profonde atteinte {sommet: couleur}
+        partial = {label: color for label, color in zip(self.labels, self.best_partial) if color >= 0}
+        return Timeout(self.timeout_reason, partial)
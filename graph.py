@@ -0,0 +1,217 @@
+import os
+import zipfile
+import tempfile
+import numpy as np
+
+CACHE_VERSION = 1  # à incrémenter si le format du cache change
+
+
+class ArrayGraph:
+    # Graphe non orienté stocké sous forme compacte (tableaux NumPy int32) :
+    # - labels : étiquette (numéro dans le fichier) de chaque sommet, dans l'ordre de première apparition dans les arêtes
+    # - indptr, indices : listes d'adjacence au format CSR, les voisins du sommet i sont indices[indptr[i]:indptr[i + 1]]
+    #   (indices de sommets, dans l'ordre d'apparition des arêtes dans le fichier)
+    # Les méthodes nodes(), edges(), neighbors() et degree() reprennent l'interface de networkx utilisée dans le projet.
+    def __init__(self, labels, indptr, indices):
+        self.labels = labels
+        self.indptr = indptr
+        self.indices = indices
+        self.label_list = labels.tolist()
+        self.index_of = {label: i for i, label in enumerate(self.label_list)}  # étiquette -> indice du sommet
+
+    @classmethod
+    def from_edges(cls, edges):
+        # Construire le graphe à partir d'un tableau (E, 2) d'arêtes données par leurs étiquettes
+        # Les boucles sont ignorées et les arêtes en double ne sont gardées qu'une fois
+        edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+        # Sommets dans l'ordre de première apparition (comme l'ordre d'insertion de networkx)
+        labels, first, inverse = np.unique(edges.ravel(), return_index=True, return_inverse=True)
+        order = np.argsort(first, kind="stable")
+        labels = labels[order].astype(np.int32)
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        ends = position[inverse.reshape(-1)].reshape(-1, 2)
+        ends = ends[ends[:, 0] != ends[:, 1]]
+        # Arcs dans les deux sens, entrelacés pour garder l'ordre du fichier, sans doublons (première occurrence gardée)
+        src = ends.ravel()
+        dst = ends[:, ::-1].ravel()
+        n = len(labels)
+        _, keep = np.unique(src * n + dst, return_index=True)
+        keep.sort()
+        src, dst = src[keep], dst[keep]
+        by_source = np.argsort(src, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+        return cls(labels, indptr, dst[by_source].astype(np.int32))
+
+    def __repr__(self):
+        return f"Graph with {self.number_of_nodes()} nodes and {self.number_of_edges()} edges"
+
+    def __len__(self):
+        return len(self.labels)
+
+    def number_of_nodes(self):
+        return len(self.labels)
+
+    def number_of_edges(self):
+        return len(self.indices) // 2
+
+    def nodes(self):
+        # Étiquettes des sommets
+        return self.label_list
+
+    def neighbor_indices(self, i):
+        # Indices des voisins du sommet d'indice i
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def neighbors(self, label):
+        # Étiquettes des voisins d'un sommet (donné par son étiquette)
+        return self.labels[self.neighbor_indices(self.index_of[label])].tolist()
+
+    def adjacency_lists(self):
+        # Listes Python des indices des voisins de chaque sommet (pour les algorithmes gloutons écrits en Python)
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        return [indices[indptr[i]:indptr[i + 1]] for i in range(len(self.labels))]
+
+    def degree(self):
+        # Degré de chaque sommet (par indice)
+        return np.diff(self.indptr)
+
+    def edge_indices(self):
+        # Arêtes (i, j) par indices de sommets, chacune une fois, dans l'ordre de parcours de networkx
+        # (sommets dans l'ordre, puis voisins non encore parcourus dans l'ordre d'adjacence)
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        for i in range(len(self.labels)):
+            for j in indices[indptr[i]:indptr[i + 1]]:
+                if j > i:
+                    yield i, j
+
+    def edges(self):
+        # Arêtes par étiquettes de sommets, chacune une fois
+        labels = self.label_list
+        return [(labels[i], labels[j]) for i, j in self.edge_indices()]
+
+    def subgraph(self, vertices):
+        # Sous-graphe induit par les sommets d'indices vertices (dans cet ordre), étiquettes et ordre des voisins conservés
+        vertices = np.asarray(vertices, dtype=np.int64)
+        position = np.full(len(self.labels), -1, dtype=np.int64)  # indice dans le sous-graphe, -1 hors du sous-graphe
+        position[vertices] = np.arange(len(vertices))
+        lengths = np.diff(self.indptr)[vertices]
+        src = np.repeat(np.arange(len(vertices)), lengths)
+        # Positions des arcs des sommets gardés dans indices : début de chaque liste + rang dans la liste
+        arcs = np.repeat(self.indptr[vertices].astype(np.int64) - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        dst = position[self.indices[arcs]]
+        kept = dst >= 0
+        indptr = np.zeros(len(vertices) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src[kept], minlength=len(vertices)), out=indptr[1:])
+        return ArrayGraph(self.labels[vertices], indptr, dst[kept].astype(np.int32))
+
+    def k_core(self, k):
+        # Retirer itérativement les sommets de degré < k (leurs voisins perdent un degré et peuvent être retirés à leur tour)
+        # Retourne (indices des sommets du k-cœur, dans l'ordre, sommets retirés dans l'ordre de retrait). Un sommet retiré
+        # a moins de k voisins parmi les sommets retirés après lui et ceux du cœur : en les colorant dans l'ordre inverse
+        # du retrait, chacun trouve toujours une couleur libre parmi k.
+        adjacency = self.adjacency_lists()
+        degree = [len(neighbors) for neighbors in adjacency]
+        removed = [d < k for d in degree]
+        stack = [vertex for vertex, d in enumerate(degree) if d < k]
+        peeled = []
+        while stack:
+            vertex = stack.pop()
+            peeled.append(vertex)
+            for other in adjacency[vertex]:
+                if not removed[other]:
+                    degree[other] -= 1
+                    if degree[other] < k:
+                        removed[other] = True
+                        stack.append(other)
+        return [vertex for vertex in range(len(adjacency)) if not removed[vertex]], peeled
+
+    def connected_components(self, vertices=None):
+        # Composantes connexes (listes d'indices de sommets triées) du sous-graphe induit par vertices (tout le graphe par défaut)
+        adjacency = self.adjacency_lists()
+        inside = [vertices is None] * len(adjacency)
+        if vertices is not None:
+            for vertex in vertices:
+                inside[vertex] = True
+        components = []
+        for start in range(len(adjacency)):
+            if not inside[start]:
+                continue
+            inside[start] = False  # déjà atteint
+            component = [start]
+            for vertex in component:
+                for other in adjacency[vertex]:
+                    if inside[other]:
+                        inside[other] = False
+                        component.append(other)
+            components.append(sorted(component))
+        return components
+
+    def to_networkx(self):
+        # Conversion en graphe networkx (affichage) ; networkx n'est nécessaire que pour cette méthode
+        import networkx as nx
+        graph = nx.Graph()
+        graph.add_nodes_from(self.label_list)
+        graph.add_edges_from(self.edges())
+        return graph
+
+
+def parse_col(file_path):
+    # Lire un fichier DIMACS .col en flux et retourner le tableau (E, 2) des arêtes (étiquettes, int32)
+    # L'en-tête "p edge V E" permet de préallouer le tableau ; il est agrandi si l'en-tête manque ou sous-estime E
+    edges = np.empty((0, 2), dtype=np.int32)
+    nb_edges = 0
+    with open(file_path, 'rb') as file:
+        for line in file:
+            first = line[:1]
+            if first == b'e':
+                if nb_edges == len(edges):
+                    edges = np.resize(edges, (max(2 * len(edges), 1024), 2))
+                _, vertex_1, vertex_2 = line.split()[:3]
+                edges[nb_edges, 0] = int(vertex_1)
+                edges[nb_edges, 1] = int(vertex_2)
+                nb_edges += 1
+            elif first == b'p':
+                fields = line.split()
+                if len(fields) >= 4 and nb_edges == 0:
+                    edges = np.empty((int(fields[3]), 2), dtype=np.int32)
+    return edges[:nb_edges]
+
+
+def cache_path(file_path):
+    # Fichier de cache binaire placé à côté de l'instance
+    return file_path + ".npz"
+
+
+def load_col(file_path, use_cache=True):
+    # Charger un graphe DIMACS .col sous forme d'ArrayGraph
+    # Avec use_cache, le graphe est enregistré dans un fichier .npz à côté de l'instance et relu directement aux appels
+    # suivants ; le cache est ignoré (et réécrit) si le fichier d'origine a changé (taille ou date de modification).
+    stat = os.stat(file_path)
+    stamp = np.array([CACHE_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+    path = cache_path(file_path)
+    if use_cache and os.path.exists(path):
+        try:
+            with np.load(path) as data:
+                if np.array_equal(data["stamp"], stamp):
+                    return ArrayGraph(data["labels"], data["indptr"], data["indices"])
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+            pass  # cache illisible (tronqué, corrompu) : on relit l'instance
+    graph = ArrayGraph.from_edges(parse_col(file_path))
+    if use_cache:
+        # Fichier temporaire propre à chaque écriture (plusieurs processus peuvent écrire le même cache en même temps),
+        # dans le même dossier pour que le renommage soit atomique
+        tmp_path = None
+        try:
+            descriptor, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+            with os.fdopen(descriptor, 'wb') as file:
+                np.savez(file, stamp=stamp, labels=graph.labels, indptr=graph.indptr, indices=graph.indices)
+            os.replace(tmp_path, path)
+        except OSError:
+            # dossier en lecture seule : pas de cache
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return graph
@@ -0,0 +1,110 @@
+import heapq
+
+VAR_HEURISTICS = ("static", "MRV", "degree", "dom/wdeg")
+
+
+class VariableOrdering:
+    # Sélection incrémentale de la prochaine variable à assigner.
+    # Les variables sont rangées dans un tas dont les entrées sont mises à jour à chaque changement de domaine,
+    # d'assignation ou de poids ; les entrées périmées sont ignorées à la lecture (suppression paresseuse).
+    # La sélection coûte O(log n) amorti au lieu d'un parcours de toutes les variables.
+    def __init__(self, csp, heuristic, domains, assignment, weights=None, rng=None):
+        # weights : poids dom/wdeg repris d'une recherche précédente (redémarrages)
+        # rng : générateur aléatoire pour départager les égalités au hasard (sinon ordre des variables)
+        if heuristic not in VAR_HEURISTICS:
+            raise ValueError("Heuristique non reconnue. Choisissez entre 'static', 'MRV', 'degree' ou 'dom/wdeg'.")
+        self.csp = csp
+        self.heuristic = heuristic
+        self.domains = domains
+        self.assignment = assignment
+        self.uses_domains = heuristic in ("MRV", "dom/wdeg")  # la clé dépend de la taille des domaines
+        self.uses_degree = heuristic in ("degree", "dom/wdeg")  # la clé dépend des voisins non assignés
+        self.order = csp.var_to_index
+        if rng is None:
+            self.rank = self.order  # départage des égalités par l'ordre des variables
+        else:
+            ranks = list(range(len(csp.variables)))
+            rng.shuffle(ranks)
+            self.rank = {var: ranks[i] for var, i in self.order.items()}
+        self.weights = weights if weights is not None else {}  # dom/wdeg : poids de chaque contrainte (paire de variables), 1 par défaut
+        # Degré pondéré restreint aux voisins non assignés (poids 1 pour l'heuristique du degré)
+        self.wdeg = {var: sum(self.weight(var, other_var) for other_var, _ in csp.neighbors[var] if other_var not in assignment) for var in csp.variables}
+        self.version = {var: 0 for var in csp.variables}
+        self.heap = []
+        for var in csp.variables:
+            if var not in assignment:
+                self.heap.append((self.key(var), self.rank[var], 0, var))
+        heapq.heapify(self.heap)
+
+    def key(self, var):
+        # Clé de tri : la variable de plus petite clé est choisie en premier
+        if self.heuristic == "MRV":
+            return self.domains.size(var)
+        if self.heuristic == "degree":
+            return -self.wdeg[var]
+        if self.heuristic == "dom/wdeg":
+            wdeg = self.wdeg[var]
+            return self.domains.size(var) / wdeg if wdeg > 0 else float("inf")
+        return 0
+
+    def weight(self, x, y):
+        return self.weights.get((x, y) if self.order[x] < self.order[y] else (y, x), 1)
+
+    def select(self):
+        # Variable non assignée de plus petite clé (None si toutes sont assignées)
+        heap = self.heap
+        while heap:
+            _, _, version, var = heap[0]
+            if version == self.version[var] and var not in self.assignment:
+                return var
+            heapq.heappop(heap)
+        return None
+
+    def update(self, variables):
+        # Recalculer la clé des variables données (domaine, degré ou poids modifiés)
+        heap = self.heap
+        for var in variables:
+            if var not in self.assignment:
+                self.version[var] += 1
+                heapq.heappush(heap, (self.key(var), self.rank[var], self.version[var], var))
+        if len(heap) > 4 * len(self.version) + 64:
+            self.compact()
+
+    def domains_changed(self, variables):
+        # Prévenir que les domaines des variables données ont été réduits ou restaurés
+        if self.uses_domains:
+            self.update(variables)
+
+    def assigned(self, var):
+        # La variable vient d'être assignée : ses voisins perdent la contribution de leur contrainte avec elle
+        if self.uses_degree:
+            neighbors = [other_var for other_var, _ in self.csp.neighbors[var]]
+            for other_var in neighbors:
+                self.wdeg[other_var] -= self.weight(var, other_var)
+            self.update(neighbors)
+
+    def unassigned(self, var):
+        # La variable vient d'être désassignée : elle revient dans le tas et ses voisins retrouvent sa contribution
+        if self.uses_degree:
+            neighbors = [other_var for other_var, _ in self.csp.neighbors[var]]
+            for other_var in neighbors:
+                self.wdeg[other_var] += self.weight(var, other_var)
+            self.update(neighbors)
+        self.update([var])
+
+    def failure(self, x, y):
+        # dom/wdeg : la contrainte entre x et y vient de vider un domaine, on augmente son poids
+        if self.heuristic != "dom/wdeg":
+            return
+        pair = (x, y) if self.order[x] < self.order[y] else (y, x)
+        self.weights[pair] = self.weights.get(pair, 1) + 1
+        if y not in self.assignment:
+            self.wdeg[x] += 1
+        if x not in self.assignment:
+            self.wdeg[y] += 1
+        self.update((x, y))
+
+    def compact(self):
+        # Reconstruire le tas sans les entrées périmées
+        self.heap = [entry for entry in self.heap if entry[2] == self.version[entry[3]] and entry[3] not in self.assignment]
+        heapq.heapify(self.heap)
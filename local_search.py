@@ -0,0 +1,183 @@
+import random
+from budget import Timeout, as_budget
+
+
+def queens_min_conflicts(n, seed=None, max_steps=None, time_limit=None, sample=8, noise=0.02, tabu_tenure=5, budget=None):
+    # Recherche locale min-conflicts pour les n dames, sans jamais construire les contraintes deux à deux.
+    # Les dames forment une permutation (une par ligne et par colonne) : seules les diagonales peuvent être en conflit.
+    # Le nombre de dames de chaque diagonale est tenu dans deux tableaux plats, ce qui rend chaque évaluation O(1).
+    # 1. Placement initial glouton : chaque ligne prend au hasard une colonne encore libre dont les diagonales sont libres
+    #    (au plus 100 essais, sinon une colonne libre quelconque) ; il reste en général une dizaine de conflits au plus.
+    # 2. Réparation : on choisit une dame en conflit et on l'échange (colonnes) avec la meilleure de `sample` dames tirées
+    #    au hasard (celle qui réduit le plus les conflits, mouvements à coût nul acceptés). Avec une probabilité `noise`
+    #    l'échange est fait au hasard (marche aléatoire) ; une dame déplacée est taboue pendant `tabu_tenure` pas.
+    # Retourne la liste des colonnes (par ligne), None s'il n'y a pas de solution (n = 2 ou 3), ou un Timeout si max_steps
+    # ou le budget (time_limit secondes par défaut) est épuisé avant une solution ; son assignation partielle contient les
+    # dames sans conflit (ligne -> colonne)
+    if n in (2, 3):
+        return None
+    budget = as_budget(budget, time_limit)
+    rng = random.Random(seed)
+    rand = rng.random
+    m = n - 1
+    cols = list(range(n))
+    up = [0] * (2 * n - 1)  # dames sur chaque diagonale ligne + colonne
+    down = [0] * (2 * n - 1)  # dames sur chaque diagonale ligne - colonne + n - 1
+    conflicted = []
+    tries = 100
+    for i in range(n):
+        if i & 0xffff == 0 and budget.exhausted():
+            return Timeout(budget.reason)
+        for _ in range(tries):
+            j = i + int(rand() * (n - i))
+            c = cols[j]
+            if up[i + c] == 0 and down[i - c + m] == 0:
+                break
+        cols[i], cols[j] = c, cols[i]
+        if up[i + c] or down[i - c + m]:
+            conflicted.append(i)
+        up[i + c] += 1
+        down[i - c + m] += 1
+
+    def in_conflict(i):
+        c = cols[i]
+        return up[i + c] > 1 or down[i - c + m] > 1
+
+    def swap(i, j):
+        # Échanger les colonnes des dames i et j, retourne la variation du nombre de paires en conflit
+        ci, cj = cols[i], cols[j]
+        delta = 0
+        up[i + ci] -= 1
+        delta -= up[i + ci]
+        down[i - ci + m] -= 1
+        delta -= down[i - ci + m]
+        up[j + cj] -= 1
+        delta -= up[j + cj]
+        down[j - cj + m] -= 1
+        delta -= down[j - cj + m]
+        delta += up[i + cj]
+        up[i + cj] += 1
+        delta += down[i - cj + m]
+        down[i - cj + m] += 1
+        delta += up[j + ci]
+        up[j + ci] += 1
+        delta += down[j - ci + m]
+        down[j - ci + m] += 1
+        cols[i], cols[j] = cj, ci
+        return delta
+
+    tabu = [0] * n  # pas jusqu'auquel la dame est taboue
+    step = 0
+    while True:
+        if not conflicted:
+            # La liste des dames en conflit est tenue paresseusement : on la reconstruit quand elle est épuisée
+            conflicted = [i for i in range(n) if in_conflict(i)]
+            if not conflicted:
+                return cols
+        index = int(rand() * len(conflicted))
+        i = conflicted[index]
+        if not in_conflict(i):
+            conflicted[index] = conflicted[-1]
+            conflicted.pop()
+            continue
+        step += 1
+        if step % 1000 == 0:
+            if max_steps is not None and step > max_steps:
+                return Timeout("steps", {row: cols[row] for row in range(n) if not in_conflict(row)})
+            budget.nodes += 1000
+            if budget.exhausted():
+                return Timeout(budget.reason, {row: cols[row] for row in range(n) if not in_conflict(row)})
+        if rand() < noise:
+            j = int(rand() * n)
+            if j != i:
+                swap(i, j)
+                tabu[i] = tabu[j] = step + tabu_tenure
+                conflicted.append(j)
+            continue
+        best_j, best_delta = -1, 1
+        for _ in range(sample):
+            j = int(rand() * n)
+            if j == i or tabu[j] > step:
+                continue
+            delta = swap(i, j)
+            swap(i, j)  # annuler l'essai
+            if delta < best_delta:
+                best_j, best_delta = j, delta
+        if best_j >= 0:
+            swap(i, best_j)
+            tabu[i] = tabu[best_j] = step + tabu_tenure
+            conflicted.append(best_j)
+
+
+def min_conflicts(csp, seed=None, max_steps=100000, time_limit=None, noise=0.05, tabu_tenure=10, budget=None):
+    # Recherche locale min-conflicts générique pour un CSP binaire (contraintes en intension, listes de voisins).
+    # Assignation initiale gloutonne (chaque variable prend la valeur en conflit avec le moins de variables déjà assignées),
+    # puis à chaque pas une variable en conflit prend la valeur de son domaine qui minimise ses conflits (égalités
+    # départagées au hasard) ; avec une probabilité `noise` elle prend une valeur au hasard (marche aléatoire), et le
+    # couple (variable, valeur) qu'elle quitte est tabou pendant `tabu_tenure` pas.
+    # Retourne la solution (dictionnaire), "No solution found" si un domaine est vide, ou un Timeout si max_steps ou le
+    # budget (time_limit secondes par défaut) est épuisé ; son assignation partielle contient les variables sans conflit
+    budget = as_budget(budget, time_limit)
+    rng = random.Random(seed)
+    domains = csp.domains
+    neighbors = csp.neighbors
+    csp.timed_out = False
+    csp.timeout_reason = None
+    assignment = {}
+
+    def conflicts(var, value):
+        return sum(1 for other_var, constraint in neighbors[var] if other_var in assignment and not constraint.check(value, assignment[other_var]))
+
+    def best_values(var, values):
+        scores = [(conflicts(var, value), value) for value in values]
+        best = min(score for score, _ in scores)
+        return best, [value for score, value in scores if score == best]
+
+    def interrupted(reason):
+        csp.timed_out = True
+        csp.timeout_reason = reason
+        return Timeout(reason, {var: value for var, value in assignment.items() if not conflicts(var, value)})
+
+    for var in csp.variables:
+        if budget.exhausted():
+            return interrupted(budget.reason)
+        values = domains[var]
+        if not values:
+            return "No solution found"
+        _, candidates = best_values(var, values)
+        assignment[var] = rng.choice(candidates)
+
+    tabu = {}  # (variable, valeur) -> pas jusqu'auquel le couple est tabou
+    conflicted = []
+    for step in range(max_steps):
+        budget.nodes += 1
+        if budget.exhausted():
+            return interrupted(budget.reason)
+        while conflicted:
+            index = rng.randrange(len(conflicted))
+            var = conflicted[index]
+            if conflicts(var, assignment[var]):
+                break
+            conflicted[index] = conflicted[-1]
+            conflicted.pop()
+        if not conflicted:
+            conflicted = [var for var in csp.variables if conflicts(var, assignment[var])]
+            if not conflicted:
+                return dict(assignment)
+            var = rng.choice(conflicted)
+        old_value = assignment[var]
+        values = [value for value in domains[var] if value != old_value and tabu.get((var, value), -1) < step]
+        if not values:
+            continue
+        if rng.random() < noise:
+            value = rng.choice(values)
+        else:
+            _, candidates = best_values(var, values)
+            value = rng.choice(candidates)
+        assignment[var] = value
+        tabu[(var, old_value)] = step + tabu_tenure
+        # Les voisins qui entrent en conflit avec la nouvelle valeur rejoignent la liste des variables en conflit
+        for other_var, constraint in neighbors[var]:
+            if not constraint.check(value, assignment[other_var]):
+                conflicted.append(other_var)
+    return interrupted("steps")
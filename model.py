@@ -1,44 +1,151 @@
 import time
 import random
-import copy
+import hashlib
+from domains import Domains
+from constraints import Table, as_constraint
+from propagation import AC2001
+from vectorized import NumpyBackend, VectorizedAC
+from heuristics import VariableOrdering
+from search import Search, NogoodStore, restart_cutoff
+from stats import SolveStats
+from budget import Timeout, as_budget
+from parallel import solve_split
+from local_search import min_conflicts
+
+
+class ConstraintRow(dict):
+    # Ligne creuse de la matrice des contraintes : seules les contraintes existantes sont stockées, None pour les autres
+    def __missing__(self, key):
+        return None
 
 
 class CSP:
-    def __init__(self, variables, domains, constraints, var_heuristic="static", val_heuristic="static"):
+    def __init__(self, variables, domains, constraints, var_heuristic="static", val_heuristic="static", backend="python", budget=None):
         # Initialisation des variables, domaines, contraintes et heuristiques pour le problème CSP
+        # backend : "python" (tests de contraintes un à un) ou "numpy" (contraintes compilées en matrices booléennes,
+        # révisions d'arcs, forward checking et LCV vectorisés ; mêmes résultats)
+        # budget : budget.Budget limitant aussi la construction du modèle (BudgetExceeded est levée s'il est épuisé)
+        time_start = time.perf_counter()
         self.variables = variables
         self.var_to_index = {var: i for i, var in enumerate(variables)}  # Associer chaque variable à un index
-        self.domains = domains  # Domaines de chaque variable
-        self.constraints = constraints  # Contraintes entre les variables
+        self.domains = domains if isinstance(domains, Domains) else Domains(domains)  # Domaines de chaque variable (masques de bits)
+        self.constraints = self.sparse_constraints(constraints, budget)  # Contraintes entre les variables (en intension, stockage creux)
+        # Listes de voisins : pour chaque variable, les couples (autre variable, contrainte) réellement contraints
+        self.neighbors = {var: [(variables[j], c) for j, c in self.constraints[i].items()] for i, var in enumerate(variables)}
         self.var_heuristic = var_heuristic  # Heuristique de sélection des variables
         self.val_heuristic = val_heuristic  # Heuristique de sélection des valeurs
+        self.rng = random.Random()  # Générateur aléatoire (heuristique 'random', redémarrages), initialisé par solve(seed=...)
+        self.ac_stats = {"revisions": 0, "checks": 0, "prunings": 0}  # Statistiques de la dernière propagation à la racine
+        self.fc_stats = {"checks": 0, "prunings": 0}  # Tests et retraits du forward checking pendant la dernière recherche
+        self.stats = SolveStats()  # Statistiques de la dernière résolution (voir stats.SolveStats)
+        self.propagator = None  # Moteur AC-2001 utilisé à la racine et pendant la recherche (MAC)
+        self.ordering = None  # Heuristique de choix de variable maintenue incrémentalement pendant la recherche
+        self.failed_arc = None  # Dernier arc (x, y) dont la propagation a vidé le domaine de x
+        self.search_stats = {}  # Statistiques de la dernière recherche (retours arrière non chronologiques, nogoods)
+        self.timed_out = False  # True si la dernière résolution s'est arrêtée sur son budget (et non sur une preuve)
+        self.timeout_reason = None  # raison de l'arrêt ("time", "nodes", "memory" ou "cancelled")
+        self.best_partial = {}  # assignation partielle la plus profonde atteinte par la dernière recherche
+        self.interchangeable_values = False  # True si toute permutation des valeurs transforme une solution en solution (coloration)
+        self.backend = None
+        self.vectors = None  # opérations vectorisées (backend "numpy")
+        self.set_backend(backend)
+        # Temps de construction du modèle (les sous-classes le remplacent par la durée totale de leur constructeur)
+        self.build_time = time.perf_counter() - time_start
+
+    def set_backend(self, backend):
+        # Choisir l'implémentation des opérations élémentaires : "python" ou "numpy"
+        if backend == "numpy":
+            if self.vectors is None:
+                self.vectors = NumpyBackend(self)
+        elif backend != "python":
+            raise ValueError("Backend non reconnu. Choisissez entre 'python' ou 'numpy'.")
+        self.backend = backend
+
+    def make_propagator(self):
+        # Moteur de cohérence d'arc correspondant au backend
+        return VectorizedAC(self) if self.backend == "numpy" else AC2001(self)
+
+    @staticmethod
+    def sparse_constraints(constraints, budget=None):
+        # Convertir les contraintes (matrice dense avec des None ou lignes indice -> contrainte) en lignes creuses
+        # Quand l'arc (i, j) porte la table transposée de celle de l'arc (j, i) déjà lu, on garde une vue Transposed de
+        # cette dernière au lieu d'un second ensemble de couples
+        sparse = []
+        reversed_pairs = {}  # table -> ensemble de ses couples retournés (calculé une fois par table)
+        for i, row in enumerate(constraints):
+            if budget is not None:
+                budget.check()
+            items = row.items() if isinstance(row, dict) else enumerate(row)
+            sparse_row = ConstraintRow()
+            for j, c in items:
+                if c is None or j == i:
+                    continue
+                c = as_constraint(c)
+                reverse = sparse[j].get(i) if j < i else None
+                if isinstance(c, Table) and isinstance(reverse, Table) and c is not reverse:
+                    if reverse not in reversed_pairs:
+                        reversed_pairs[reverse] = frozenset((b, a) for a, b in reverse.allowed)
+                    if c.allowed == reversed_pairs[reverse]:
+                        c = reverse.transpose()
+                sparse_row[j] = c
+            sparse.append(sparse_row)
+        return sparse
+
+    def fingerprint(self):
+        # Empreinte (sha256) du contenu du problème : variables, domaines courants et contraintes (clé de result_cache.ResultCache)
+        # None si une contrainte n'est connue que par sa fonction (Predicate) : le problème ne peut alors pas être mis en cache
+        digest = hashlib.sha256(type(self).__name__.encode())
+        for i, var in enumerate(self.variables):
+            digest.update(repr((var, list(self.domains.iter_values(var)))).encode())
+            for j, c in sorted(self.constraints[i].items()):
+                if c.signature() is c:
+                    return None
+                digest.update(repr((j, c)).encode())
+        return digest.hexdigest()
+
+    def source(self):
+        # (fichier d'où vient l'instance, empreinte de son contenu), None si elle est construite en mémoire : quand le
+        # contenu du fichier change, le cache oublie les résultats de l'ancienne version
+        return None
+
+    def is_feasible(self, solution):
+        # Vérifier qu'une solution affecte à chaque variable une valeur de son domaine et satisfait toutes les contraintes
+        if not isinstance(solution, dict) or len(solution) != len(self.variables):
+            return False
+        for var in self.variables:
+            if var not in solution or not self.domains.contains(var, solution[var]):
+                return False
+        for i, x in enumerate(self.variables):
+            for j, c in self.constraints[i].items():
+                if not c.check(solution[x], solution[self.variables[j]]):
+                    return False
+        return True
+
+    def symmetry_images(self, assignment):
+        # Images d'une assignation (éventuellement partielle) par les symétries de variables du problème, hors identité
+        # (liste de dictionnaires variable -> valeur) ; aucune symétrie déclarée par défaut
+        return []
+
+    def constraint(self, x, y):
+        # Contrainte entre les variables x et y, None si elles ne sont pas contraintes
+        return self.constraints[self.var_to_index[x]][self.var_to_index[y]]
 
     def is_consistent(self, var, value, assignment):
         # Vérifier si l'assignation de la valeur à la variable est consistante avec les contraintes existantes
-        for other_var in assignment:
-            if other_var != var:
-                other_value = assignment[other_var]
-                ind_var = self.var_to_index[var]
-                ind_other_var = self.var_to_index[other_var]
-                if self.constraints[ind_var][ind_other_var] is not None:
-                    if (value, other_value) not in self.constraints[ind_var][ind_other_var]:
-                        return False  # Incohérence détectée
+        for other_var, constraint in self.neighbors[var]:
+            if other_var in assignment and not constraint.check(value, assignment[other_var]):
+                return False  # Incohérence détectée
         return True
 
-    def select_unassigned_variable(self, assignment):
+    def select_unassigned_variable(self, assignment, domains=None):
         # Sélectionner la prochaine variable non assignée en fonction de l'heuristique choisie
-        unassigned_vars = [v for v in self.variables if v not in assignment]
-
-        if self.var_heuristic == "static":
-            return unassigned_vars[0]  # Retourne la première variable non assignée
-        elif self.var_heuristic == "MRV":
-            # Minimum Remaining Values (MRV): Choisir la variable avec le moins de valeurs possibles dans son domaine
-            return min(unassigned_vars, key=lambda var: len([value for value in self.domains[var] if self.is_consistent(var, value, assignment)]))
-        elif self.var_heuristic == "degree":
-            # Degree Heuristic: Choisir la variable avec le plus de contraintes sur les autres variables non assignées
-            return max(unassigned_vars, key=lambda var: sum(1 for other_var in self.variables if other_var != var and other_var not in assignment and self.constraints[self.var_to_index[var]][self.var_to_index[other_var]] is not None))
-        else:
-            raise ValueError("Heuristique non reconnue. Choisissez entre 'static', 'MRV', ou 'degree'.")
+        # 'static', 'MRV' (plus petit domaine), 'degree' (plus de voisins non assignés) ou 'dom/wdeg'
+        # (taille du domaine divisée par le poids des contraintes ayant provoqué des échecs)
+        if domains is None:
+            domains = self.domains
+        if self.ordering is None or self.ordering.domains is not domains or self.ordering.assignment is not assignment:
+            self.ordering = VariableOrdering(self, self.var_heuristic, domains, assignment)
+        return self.ordering.select()
 
     def order_domain_values(self, var, assignment, domains=None):
         # Ordonner les valeurs du domaine de la variable selon l'heuristique de choix des valeurs
@@ -48,10 +155,12 @@ class CSP:
             return sorted(domains[var], reverse=True) if domains is not None else sorted(self.domains[var], reverse=True)
         elif self.val_heuristic == "random":
             values = list(domains[var]) if domains is not None else list(self.domains[var])
-            random.shuffle(values)
+            self.rng.shuffle(values)
             return values
         elif self.val_heuristic == "LCV":
             # Least Constraining Value (LCV): Trie en fonction du nombre de valeurs compatibles restantes pour les voisins
+            if self.backend == "numpy":
+                return self.vectors.order_least_constraining(var, assignment, domains if domains is not None else self.domains)
             return sorted(domains[var], key=lambda val: self.count_conflicts(var, val, assignment)) if domains is not None else sorted(self.domains[var], key=lambda val: self.count_conflicts(var, val, assignment))
         else:
             raise ValueError("Heuristique de valeur non reconnue.")
@@ -59,146 +168,257 @@ class CSP:
     def count_conflicts(self, var, value, assignment):
         # Compte les conflits introduits par l'attribution de 'value' à 'var'
         count = 0
-        ind_var = self.var_to_index[var]
-        for other_var in self.variables:
-            if other_var != var and other_var not in assignment:
-                ind_other_var = self.var_to_index[other_var]
-                if self.constraints[ind_var][ind_other_var] is not None:
-                    count += sum(1 for val in self.domains[other_var] if (value, val) not in self.constraints[ind_var][ind_other_var])
+        for other_var, constraint in self.neighbors[var]:
+            if other_var not in assignment:
+                count += sum(1 for val in self.domains.iter_values(other_var) if not constraint.check(value, val))
         return count
 
-    def backtrack(self, assignment={}, domains=None, use_ac3_meanwhile=True, fc=False, time_limit=None, time_start=None):
-        # Algorithme de recherche par backtracking pour trouver une solution
-        if len(assignment) == len(self.variables):
-            return assignment  # Retourne l'assignation si toutes les variables sont assignées
-
-        var = self.select_unassigned_variable(assignment)
-        search_domain = self.order_domain_values(var, assignment, domains)
-        new_domains = self.domains.copy()
-
-        for value in search_domain:
-            if time_limit is not None and time.time() - time_start > time_limit:
-                print("time limit reached")
-                return None
-            if self.is_consistent(var, value, assignment):
-                if fc:
-                    res_fc = self.forward_checking(var, value, assignment, domains)
-                    if res_fc is None:
-                        continue
-                    new_domains = res_fc
-                if use_ac3_meanwhile:
-                    res_ac = self.ac3_meanwhile(var, value, assignment, domains)
-                    if not res_ac:
-                        continue
-                    new_domains = res_ac
-                assignment[var] = value  # Assigner la valeur à la variable
-                if fc or use_ac3_meanwhile:
-                    result = self.backtrack(assignment, new_domains, fc=fc, use_ac3_meanwhile=use_ac3_meanwhile, time_limit=time_limit, time_start=time_start)
-                else:
-                    result = self.backtrack(assignment, domains, fc=fc, time_limit=time_limit, time_start=time_start)
-                if result is not None:
-                    return result
-                del assignment[var]  # Annuler l'assignation si cela ne mène pas à une solution
-
+    def backtrack(self, assignment=None, domains=None, use_ac3_meanwhile=True, fc=False, budget=None, backjumping=False):
+        # Algorithme de recherche par backtracking pour trouver une solution (première solution de la recherche itérative)
+        if domains is None:
+            domains = self.domains.copy()
+        search = Search(self, domains, assignment, use_ac3_meanwhile=use_ac3_meanwhile, fc=fc, budget=budget, backjumping=backjumping)
+        self.search_stats = search.stats
+        for solution in search.solutions():
+            return solution
         return None
 
+    def undo_domains(self, domains, mark):
+        # Annuler les retraits depuis mark et mettre à jour l'heuristique de choix de variable
+        changed = {v for v, _ in domains.trail[mark:]}
+        domains.undo(mark)
+        self.ordering.domains_changed(changed)
+
     def forward_checking(self, var, value, assignment, domains):
-        # Appliquer le forward checking pour réduire les domaines des variables non assignées
-        new_domains = domains.copy()
-        for other_var in self.variables:
-            if other_var not in assignment and other_var != var:
-                ind_var = self.var_to_index[var]
-                ind_other_var = self.var_to_index[other_var]
-                if self.constraints[ind_var][ind_other_var] is not None:
-                    new_domains[other_var] = [val for val in new_domains[other_var] if (value, val) in self.constraints[ind_var][ind_other_var]]
-                    if len(new_domains[other_var]) == 0:
-                        return None  # Retourne None si aucun domaine possible n'est trouvé
-        return new_domains
-
-    def ac3(self, time_limit=None, time_start=None):
+        # Appliquer le forward checking pour réduire (sur place) les domaines des variables non assignées
+        if self.backend == "numpy":
+            return self.vectors.forward_checking(var, value, assignment, domains)
+        stats = self.fc_stats
+        for other_var, constraint in self.neighbors[var]:
+            if other_var not in assignment:
+                values = domains[other_var]
+                stats["checks"] += len(values)
+                for val in values:
+                    if not constraint.check(value, val):
+                        domains.remove(other_var, val)
+                        stats["prunings"] += 1
+                if domains.is_empty(other_var):
+                    self.failed_arc = (other_var, var)
+                    if self.ordering is not None:
+                        self.ordering.failure(var, other_var)
+                    return False  # Retourne False si un domaine est vidé
+        return True
+
+    def ac3(self, budget=None):
         # Implémenter l'algorithme AC3 pour réduire les domaines des variables
-        queue = [(x, y) for x in self.variables for y in self.variables if self.constraints[self.var_to_index[x]][self.var_to_index[y]] is not None]
+        queue = [(x, y) for x in self.variables for y, _ in self.neighbors[x]]
         while queue:
-            if time_limit is not None and time.time() - time_start > time_limit:
-                print("time limit reached")
+            if budget is not None and budget.exhausted():
                 return None
             x, y = queue.pop(0)
-            ind_x = self.var_to_index[x]
-            ind_y = self.var_to_index[y]
+            self.ac_stats["revisions"] += 1
             for i in self.domains[x]:
                 if self.not_supported(x, y, i):
-                    self.domains[x].remove(i)  # Supprimer la valeur du domaine si elle n'est pas supportée
-                    for z in self.variables:
-                        if z != x:
-                            ind_z = self.var_to_index[z]
-                            if self.constraints[ind_x][ind_z] is not None:
-                                self.constraints[ind_x][ind_z] = [(a, b) for a, b in self.constraints[ind_x][ind_z] if a != i]
-                                self.constraints[ind_z][ind_x] = [(a, b) for a, b in self.constraints[ind_z][ind_x] if b != i]
-                    arc_to_add = [(z, x) for z in self.variables if z != x]
+                    self.domains.remove(x, i)  # Supprimer la valeur du domaine si elle n'est pas supportée
+                    self.ac_stats["prunings"] += 1
+                    arc_to_add = [(z, x) for z, _ in self.neighbors[x]]
                     queue.extend([arc for arc in arc_to_add if arc not in queue])
-                if len(self.domains[x]) == 0:
+                if self.domains.is_empty(x):
                     return False
         return True
     
     def ac3_meanwhile(self, var, value, assignment, domains):
-        # Appliquer AC3 pendant l'assignation pour ajuster les domaines
-        new_domains = copy.deepcopy(domains)
-        new_domains[var] = [value]
-        new_constraints = copy.deepcopy(self.constraints)
-        ind_var = self.var_to_index[var]
-        for other_var in self.variables:
-            if var != other_var:
-                ind_other_var = self.var_to_index[other_var]
-                if self.constraints[ind_var][ind_other_var] is not None:
-                    new_constraints[ind_var][ind_other_var] = [(a, b) for a, b in self.constraints[ind_var][ind_other_var] if a in new_domains[var]]
-                    if len(new_constraints[ind_var][ind_other_var]) == 0:
-                        return False
-                    new_constraints[ind_other_var][ind_var] = [(a, b) for a, b in self.constraints[ind_other_var][ind_var] if b in new_domains[var]]
-                    if len(new_constraints[ind_other_var][ind_var]) == 0:
-                        return False
-        queue = [(x, y) for x in self.variables for y in self.variables if new_constraints[self.var_to_index[x]][self.var_to_index[y]] is not None]
-        while queue:
-            x, y = queue.pop(0)
-            ind_x = self.var_to_index[x]
-            ind_y = self.var_to_index[y]
-            for i in new_domains[x]:
-                if self.not_supported(x, y, i):
-                    new_domains[x].remove(i)
-                    for z in self.variables:
-                        if z != x:
-                            ind_z = self.var_to_index[z]
-                            if new_constraints[ind_x][ind_z] is not None:
-                                new_constraints[ind_x][ind_z] = [(a, b) for a, b in new_constraints[ind_x][ind_z] if a != i]
-                                new_constraints[ind_z][ind_x] = [(a, b) for a, b in new_constraints[ind_z][ind_x] if b != i]
-                                if len(new_constraints[ind_x][ind_z]) == 0 or len(new_constraints[ind_z][ind_x]) == 0:
-                                    return False
-                    arc_to_add = [(z, x) for z in self.variables if z != x]
-                    queue.extend([arc for arc in arc_to_add if arc not in queue])
-                if len(new_domains[x]) == 0:
-                    return False
-        return new_domains
+        # Maintenir la cohérence d'arc (MAC) après l'assignation de la valeur à la variable
+        # Les domaines sont filtrés sur place (retraits enregistrés dans le journal), les relations ne sont jamais copiées
+        if self.propagator is None:
+            self.propagator = self.make_propagator()
+        domains.assign(var, value)
+        arcs = [(z, var, c) for z, c in self.propagator.incoming[var]]
+        result = self.propagator.propagate(domains, arcs)
+        if result is False:
+            self.failed_arc = self.propagator.failed_arc
+            if self.ordering is not None:
+                self.ordering.failure(*self.failed_arc)
+        return result is True
 
-    def not_supported(self, x, y, i):
+    def not_supported(self, x, y, i, domains=None):
         # Vérifier si une valeur n'est pas supportée par les contraintes
-        ind_x = self.var_to_index[x]
-        ind_y = self.var_to_index[y]
-        if self.constraints[ind_x][ind_y] is not None:
-            if not any([(i, j) in self.constraints[ind_x][ind_y] for j in self.domains[y]]):
-                return True
+        if domains is None:
+            domains = self.domains
+        if self.backend == "numpy":
+            self.ac_stats["checks"] += 1
+            return self.vectors.not_supported(x, y, i, domains)
+        constraint = self.constraint(x, y)
+        if constraint is not None:
+            for j in domains.iter_values(y):
+                self.ac_stats["checks"] += 1
+                if constraint.check(i, j):
+                    return False
+            return True
         return False
 
-    def solve(self, use_ac3=True, use_ac3_meanwhile=False, fc=False, time_limit=None):
-        # Résoudre le problème CSP avec les options spécifiées
-        time_start = time.time()
+    def iter_solutions(self, use_ac3=True, use_ac3_meanwhile=False, fc=False, time_limit=None, ac_algorithm="ac2001", max_solutions=None,
+                       backjumping=False, learn_nogoods=False, max_nogoods=1000, max_nogood_size=10,
+                       restarts=None, restart_base=100, restart_factor=1.5, carry_over=True, seed=None, warm_start=None, symmetry_breaking=False,
+                       on_node=None, on_backtrack=None, on_solution=None, budget=None):
+        # Générer les solutions une à une (sans relancer la recherche), au plus max_solutions si précisé
+        # ac_algorithm : "ac2001" (supports résiduels, file à double entrée) ou "ac3" (version d'origine)
+        # backjumping : retour arrière dirigé par les conflits (CBJ)
+        # learn_nogoods : apprendre les ensembles de conflits d'au plus max_nogood_size variables (au plus max_nogoods, LRU)
+        # restarts : "luby" ou "geometric", relancer la recherche (égalités départagées au hasard) après restart_base * luby(i)
+        # ou restart_base * restart_factor^(i-1) échecs ; carry_over conserve poids dom/wdeg, nogoods et phases entre les essais
+        # seed : graine du générateur aléatoire, pour des résultats reproductibles
+        # warm_start : assignation (éventuellement partielle) dont les valeurs sont essayées en premier, par exemple une
+        # solution d'un problème voisin (sauvegarde de phase initialisée avec cette assignation)
+        # symmetry_breaking : casser les symétries du problème (valeurs interchangeables, symmetry_images) ; en énumération,
+        # une seule solution par classe de symétrie est alors produite
+        # on_node(var, value, profondeur), on_backtrack(var, profondeur), on_solution(solution) : fonctions appelées à chaque
+        # valeur essayée, à chaque niveau épuisé et à chaque solution (aucun coût quand elles valent None)
+        # Les statistiques de la résolution sont dans self.stats (SolveStats), mises à jour à chaque solution et à la fin
+        # budget : budget.Budget (temps, nœuds, mémoire, annulation) à la place de time_limit ; s'il est épuisé, la
+        # génération s'arrête avec self.timed_out, self.timeout_reason et self.best_partial renseignés
+        if restarts is not None and max_solutions != 1:
+            raise ValueError("Les redémarrages ne sont possibles qu'en recherche d'une seule solution (max_solutions=1).")
+        if seed is not None:
+            self.rng = random.Random(seed)
+        budget = as_budget(budget, time_limit)
+        self.ac_stats = {"revisions": 0, "checks": 0, "prunings": 0}
+        self.fc_stats = {"checks": 0, "prunings": 0}
+        self.stats = SolveStats(build_time=self.build_time)
+        self.search_stats = {}
+        self.propagator = self.make_propagator()
+        self.timed_out = False
+        self.timeout_reason = None
+        self.best_partial = {}
+        hooks = {"on_node": on_node, "on_backtrack": on_backtrack, "on_solution": on_solution}
 
+        phase_start = time.perf_counter()
         if use_ac3:
-            result_ac3 = self.ac3(time_limit=time_limit, time_start=time_start)
+            if ac_algorithm == "ac2001":
+                result_ac3 = self.propagator.propagate(self.domains, budget=budget)
+                self.ac_stats = {"revisions": self.propagator.revisions, "checks": self.propagator.checks, "prunings": self.propagator.prunings}
+            elif ac_algorithm == "ac3":
+                result_ac3 = self.ac3(budget=budget)
+            else:
+                raise ValueError("Algorithme de cohérence d'arc non reconnu. Choisissez entre 'ac2001' ou 'ac3'.")
             if result_ac3 is None or not result_ac3:
-                return "No solution found"
-        print("AC3 done after", time.time() - time_start)
-        assignment = {}
-        result = self.backtrack(assignment=assignment, domains=self.domains.copy(), use_ac3_meanwhile=use_ac3_meanwhile, fc=fc, time_limit=time_limit, time_start=time_start)
-        if result is None:
-            return "No solution found"
+                self.timed_out = result_ac3 is None
+                self.timeout_reason = budget.reason
+                self.stats.preprocessing_time = time.perf_counter() - phase_start
+                self.update_stats(ac_algorithm)
+                return
+        self.stats.preprocessing_time = time.perf_counter() - phase_start
+        phase_start = time.perf_counter()
+        nogoods = NogoodStore(max_nogoods, max_nogood_size) if learn_nogoods else None
+        try:
+            if restarts is None:
+                search = Search(self, self.domains.copy(), use_ac3_meanwhile=use_ac3_meanwhile, fc=fc, budget=budget,
+                                backjumping=backjumping, nogoods=nogoods, phases=dict(warm_start) if warm_start else None, symmetry_breaking=symmetry_breaking,
+                                **hooks)
+                self.search_stats = search.stats
+                for nb_solutions, solution in enumerate(search.solutions(), start=1):
+                    self.update_stats(ac_algorithm, phase_start)
+                    yield solution
+                    if max_solutions is not None and nb_solutions >= max_solutions:
+                        return
+                self.timed_out = search.timed_out
+                self.timeout_reason = budget.reason if search.timed_out else None
+                return
+
+            # Redémarrages : chaque essai est interrompu après un nombre d'échecs croissant, le dernier est complet
+            self.search_stats = {"restarts": 0}
+            weights, phases = {}, dict(warm_start or {})
+            run = 0
+            while True:
+                run += 1
+                if not carry_over:
+                    weights, phases = {}, dict(warm_start or {})
+                    nogoods = NogoodStore(max_nogoods, max_nogood_size) if learn_nogoods else None
+                search = Search(self, self.domains.copy(), use_ac3_meanwhile=use_ac3_meanwhile, fc=fc, budget=budget,
+                                backjumping=backjumping, nogoods=nogoods, fail_limit=restart_cutoff(restarts, run, restart_base, restart_factor),
+                                weights=weights, phases=phases, rng=self.rng, stats=self.search_stats, symmetry_breaking=symmetry_breaking, **hooks)
+                for solution in search.solutions():
+                    self.update_stats(ac_algorithm, phase_start)
+                    yield solution
+                    return
+                if not search.cutoff_reached:
+                    self.timed_out = search.timed_out
+                    self.timeout_reason = budget.reason if search.timed_out else None
+                    return  # Recherche complète sans solution, ou limite de temps atteinte
+                self.search_stats["restarts"] += 1
+        finally:
+            self.update_stats(ac_algorithm, phase_start)
+
+    def update_stats(self, ac_algorithm="ac2001", search_start=None):
+        # Reporter dans self.stats les compteurs de la propagation, du forward checking et de la recherche
+        # search_start : début de la recherche (time.perf_counter()), None si la recherche n'a pas commencé
+        stats = self.stats
+        search = self.search_stats
+        root = self.ac_stats if ac_algorithm == "ac3" else {}  # l'AC-3 d'origine ne passe pas par le propagateur
+        propagator = self.propagator
+        stats.nodes = search.get("nodes", 0)
+        stats.backtracks = search.get("backtracks", 0)
+        stats.max_depth = search.get("max_depth", 0)
+        stats.checks = propagator.checks + root.get("checks", 0) + self.fc_stats["checks"]
+        stats.revisions = propagator.revisions + root.get("revisions", 0)
+        stats.prunings = propagator.prunings + root.get("prunings", 0) + self.fc_stats["prunings"]
+        stats.search = {key: value for key, value in search.items() if key not in ("nodes", "backtracks", "max_depth")}
+        if search_start is not None:
+            stats.search_time = time.perf_counter() - search_start
+
+    def solve_local(self, seed=None, max_steps=100000, time_limit=None, noise=0.05, tabu_tenure=10, budget=None):
+        # Résoudre par recherche locale min-conflicts (incomplète : ne prouve jamais l'absence de solution)
+        # Retourne la solution, ou un Timeout si elle n'a pas abouti en max_steps pas ou dans le budget (time_limit secondes)
+        self.stats = SolveStats(build_time=self.build_time)
+        search_start = time.perf_counter()
+        result = min_conflicts(self, seed=seed, max_steps=max_steps, noise=noise, tabu_tenure=tabu_tenure, budget=as_budget(budget, time_limit))
+        self.stats.search_time = time.perf_counter() - search_start
+        return result
+
+    def count_solutions(self, **kwargs):
+        # Compter les solutions en les parcourant au fil de l'eau (mêmes options que iter_solutions)
+        return sum(1 for _ in self.iter_solutions(**kwargs))
+
+    def solve(self, use_ac3=True, use_ac3_meanwhile=False, fc=False, time_limit=None, ac_algorithm="ac2001",
+              backjumping=False, learn_nogoods=False, max_nogoods=1000, max_nogood_size=10,
+              restarts=None, restart_base=100, restart_factor=1.5, carry_over=True, seed=None, warm_start=None, symmetry_breaking=False, parallel=None,
+              on_node=None, on_backtrack=None, on_solution=None, return_stats=False, budget=None, cache=None):
+        # Résoudre le problème CSP avec les options spécifiées
+        # Retourne la solution, "No solution found" si le problème n'a pas de solution (preuve), ou un budget.Timeout
+        # (raison de l'arrêt et meilleure assignation partielle atteinte) si la limite de temps ou le budget est épuisé
+        # budget : budget.Budget (temps sur horloge monotone, nœuds, mémoire, annulation depuis un autre thread) à la place de time_limit
+        # parallel : nombre de processus entre lesquels l'espace de recherche est découpé (None : résolution séquentielle)
+        # on_node, on_backtrack, on_solution : fonctions de suivi de la recherche (voir iter_solutions), en séquentiel seulement
+        # return_stats : retourner (résultat, statistiques) au lieu du seul résultat ; les statistiques sont aussi dans self.stats
+        # cache : result_cache.ResultCache ; un résultat concluant déjà calculé avec les mêmes options est relu (et revérifié)
+        # au lieu d'être recalculé, time_limit, budget et fonctions de suivi ne faisant pas partie de la clé
+        if cache is not None:
+            options = dict(use_ac3=use_ac3, use_ac3_meanwhile=use_ac3_meanwhile, fc=fc, ac_algorithm=ac_algorithm, backjumping=backjumping,
+                           learn_nogoods=learn_nogoods, max_nogoods=max_nogoods, max_nogood_size=max_nogood_size, restarts=restarts,
+                           restart_base=restart_base, restart_factor=restart_factor, carry_over=carry_over, seed=seed, warm_start=warm_start,
+                           symmetry_breaking=symmetry_breaking, parallel=parallel)
+            result = cache.solve(self, options, time_limit=time_limit, budget=budget, on_node=on_node, on_backtrack=on_backtrack, on_solution=on_solution)
+            return (result, self.stats) if return_stats else result
+        if parallel is not None:
+            if symmetry_breaking and self.interchangeable_values:
+                # La règle de la plus petite valeur inutilisée dépend de l'ordre d'assignation, que le découpage ne conserve pas
+                raise ValueError("La symétrie des valeurs ne peut pas être cassée en résolution parallèle.")
+            if on_node is not None or on_backtrack is not None or on_solution is not None:
+                raise ValueError("Les fonctions de suivi ne sont pas disponibles en résolution parallèle.")
+            result = solve_split(self, processes=parallel, budget=as_budget(budget, time_limit), use_ac3=use_ac3, use_ac3_meanwhile=use_ac3_meanwhile, fc=fc,
+                                 ac_algorithm=ac_algorithm, backjumping=backjumping, learn_nogoods=learn_nogoods, max_nogoods=max_nogoods,
+                                 max_nogood_size=max_nogood_size, restarts=restarts, restart_base=restart_base, restart_factor=restart_factor,
+                                 carry_over=carry_over, seed=seed, warm_start=warm_start, symmetry_breaking=symmetry_breaking)
+            return (result, self.stats) if return_stats else result
+        result = "No solution found"
+        for solution in self.iter_solutions(use_ac3=use_ac3, use_ac3_meanwhile=use_ac3_meanwhile, fc=fc, budget=as_budget(budget, time_limit), ac_algorithm=ac_algorithm, max_solutions=1,
+                                            backjumping=backjumping, learn_nogoods=learn_nogoods, max_nogoods=max_nogoods, max_nogood_size=max_nogood_size,
+                                            restarts=restarts, restart_base=restart_base, restart_factor=restart_factor, carry_over=carry_over, seed=seed,
+                                            warm_start=warm_start, symmetry_breaking=symmetry_breaking,
+                                            on_node=on_node, on_backtrack=on_backtrack, on_solution=on_solution):
+            result = solution
+            break
         else:
-            return result
+            if self.timed_out:
+                result = Timeout(self.timeout_reason, self.best_partial)
+        return (result, self.stats) if return_stats else result
@@ -1,31 +1,105 @@
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 from model import CSP
+from constraints import QueensConstraint
+from local_search import queens_min_conflicts
+from stats import SolveStats
+from budget import Timeout, as_budget
 
 class N_QUEENS(CSP):
-    def __init__(self, n, var_heuristic="static", val_heuristic="static"):
+    # Attributs créés par la construction du modèle CSP (CSP.__init__, build_model) : seul leur accès déclenche la
+    # construction paresseuse, tout autre attribut absent lève AttributeError (hasattr, fautes de frappe)
+    MODEL_ATTRIBUTES = frozenset(["variables", "var_to_index", "domains", "constraints", "neighbors", "rng", "ac_stats", "fc_stats",
+                                  "stats", "propagator", "ordering", "failed_arc", "search_stats", "timed_out", "timeout_reason",
+                                  "best_partial", "interchangeable_values", "vectors", "build_time"])
+
+    def __init__(self, n, var_heuristic="static", val_heuristic="static", backend="python", budget=None, lazy=True):
+        # budget : budget.Budget limitant aussi la génération des n² contraintes (BudgetExceeded s'il est épuisé)
+        # lazy : ne construire le modèle CSP (n domaines de n valeurs, n(n - 1) contraintes) qu'à sa première utilisation,
+        # la recherche locale (solve_local) n'en a pas besoin ; avec lazy=False il est construit tout de suite
         self.n = n
-        variables = list(range(n))
-        domains = {var: list(range(n)) for var in variables}
-        constraints = self.generate_constraints()
-        super().__init__(variables, domains, constraints, var_heuristic, val_heuristic)
+        self.var_heuristic = var_heuristic
+        self.val_heuristic = val_heuristic
+        self.backend = backend
+        self._pending_build = budget
+        if not lazy:
+            self.build_model()
+
+    def build_model(self):
+        # Construire le modèle CSP s'il ne l'est pas encore (appelé automatiquement au premier accès à un de ses attributs)
+        if "_pending_build" not in self.__dict__:
+            return
+        budget = self.__dict__.pop("_pending_build")
+        try:
+            time_start = time.perf_counter()
+            variables = list(range(self.n))
+            domains = {var: list(range(self.n)) for var in variables}
+            constraints = self.generate_constraints(budget)
+            super().__init__(variables, domains, constraints, self.var_heuristic, self.val_heuristic, self.backend, budget)
+            self.build_time = time.perf_counter() - time_start
+        except BaseException:
+            self._pending_build = budget
+            raise
+
+    def __getattr__(self, name):
+        # Attribut du modèle CSP (domaines, contraintes, statistiques...) alors qu'il n'est pas encore construit
+        if name not in self.MODEL_ATTRIBUTES or "_pending_build" not in self.__dict__:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        self.build_model()
+        return getattr(self, name)
     
-    def generate_constraints(self):
-        constraints = [[None for _ in range(self.n)] for _ in range(self.n)]
+    def generate_constraints(self, budget=None):
+        constraints = [{} for _ in range(self.n)]  # Lignes creuses : indice de l'autre dame -> contrainte
+        relations = [QueensConstraint(distance) for distance in range(self.n)]  # une relation par distance, partagée
 
         for i in range(self.n):
+            if budget is not None:
+                budget.check()
             for j in range(self.n):
                 if i != j:
-                    possible_positions = []
-                    for k in range(self.n):
-                        for l in range(self.n):
-                            # Les dames ne doivent pas être sur la même ligne, la même colonne ou la même diagonale
-                            if k != l and abs(i - j) != abs(k - l):
-                                possible_positions.append((k, l))
-                    constraints[i][j] = possible_positions
+                    # Les dames ne doivent pas être sur la même ligne, la même colonne ou la même diagonale
+                    constraints[i][j] = relations[abs(i - j)]
 
         return constraints
     
+    def fingerprint(self):
+        # Le problème est entièrement décrit par n (domaines complets, contraintes implicites)
+        return f"N_QUEENS {self.n}"
+
+    def solve_local(self, seed=None, max_steps=None, time_limit=None, noise=0.02, tabu_tenure=5, budget=None):
+        # Recherche locale min-conflicts spécialisée (compteurs de diagonales, voir local_search.queens_min_conflicts)
+        # Elle n'utilise ni les domaines ni les contraintes : le modèle CSP n'est pas construit (voir lazy), ce qui permet
+        # de très grands n (N_QUEENS(10**6).solve_local())
+        # Retourne la solution, "No solution found" (n = 2 ou 3) ou un Timeout (dames sans conflit au moment de l'arrêt)
+        self.stats = SolveStats(build_time=self.__dict__.get("build_time", 0))
+        search_start = time.perf_counter()
+        cols = queens_min_conflicts(self.n, seed=seed, max_steps=max_steps, noise=noise, tabu_tenure=tabu_tenure, budget=as_budget(budget, time_limit))
+        self.stats.search_time = time.perf_counter() - search_start
+        self.timed_out = isinstance(cols, Timeout)
+        self.timeout_reason = cols.reason if self.timed_out else None
+        if cols is None:
+            return "No solution found"
+        if self.timed_out:
+            return cols
+        return dict(enumerate(cols))
+
+    def symmetry_images(self, assignment):
+        # Images d'une assignation (ligne -> colonne) par les 7 symétries non triviales de l'échiquier :
+        # réflexions verticale, horizontale et diagonales, rotations de 90, 180 et 270 degrés
+        m = self.n - 1
+        images = [{}, {}, {}, {}, {}, {}, {}]
+        mirror, flip, half_turn, transpose, anti_transpose, quarter_turn, three_quarter_turn = images
+        for row, col in assignment.items():
+            mirror[row] = m - col
+            flip[m - row] = col
+            half_turn[m - row] = m - col
+            transpose[col] = row
+            anti_transpose[m - col] = m - row
+            quarter_turn[col] = m - row
+            three_quarter_turn[m - col] = row
+        return images
+
     def solution_printer(self, solution):
         # Créer un tableau vide de n x n pour l'échiquier
         damier = [['.' for _ in range(self.n)] for _ in range(self.n)]
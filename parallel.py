@@ -0,0 +1,306 @@
+import os
+import time
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+from heuristics import VariableOrdering
+from stats import SolveStats
+from budget import Timeout, as_budget
+
+# Portefeuille par défaut : combinaisons d'heuristiques et de propagations aux comportements complémentaires
+DEFAULT_PORTFOLIO = [
+    {"var_heuristic": "dom/wdeg", "val_heuristic": "static", "use_ac3": True, "use_ac3_meanwhile": True, "fc": False},
+    {"var_heuristic": "MRV", "val_heuristic": "static", "use_ac3": True, "use_ac3_meanwhile": False, "fc": True},
+    {"var_heuristic": "MRV", "val_heuristic": "LCV", "use_ac3": True, "use_ac3_meanwhile": False, "fc": True},
+    {"var_heuristic": "degree", "val_heuristic": "static", "use_ac3": True, "use_ac3_meanwhile": True, "fc": False},
+    {"var_heuristic": "dom/wdeg", "val_heuristic": "static", "use_ac3": True, "use_ac3_meanwhile": False, "fc": True, "backjumping": True, "learn_nogoods": True},
+    {"var_heuristic": "MRV", "val_heuristic": "random", "use_ac3": True, "use_ac3_meanwhile": False, "fc": True, "restarts": "luby", "seed": 1},
+    {"var_heuristic": "dom/wdeg", "val_heuristic": "random", "use_ac3": True, "use_ac3_meanwhile": True, "fc": False, "restarts": "luby", "seed": 2},
+    {"var_heuristic": "static", "val_heuristic": "static", "use_ac3": True, "use_ac3_meanwhile": False, "fc": True},
+]
+
+
+def run_configuration(problem, configuration, time_limit=None, budget=None):
+    # Construire le problème avec les heuristiques de la configuration et le résoudre
+    # Retourne (statut, résultat) avec statut parmi "solved" (résultat : la solution), "unsat" (None) ou "timeout"
+    # (le budget.Timeout, avec l'assignation partielle la plus profonde)
+    options = dict(configuration)
+    var_heuristic = options.pop("var_heuristic", "static")
+    val_heuristic = options.pop("val_heuristic", "static")
+    csp = problem(var_heuristic=var_heuristic, val_heuristic=val_heuristic)
+    result = csp.solve(time_limit=time_limit, budget=budget, **options)
+    if isinstance(result, dict):
+        return "solved", result
+    if isinstance(result, Timeout):
+        return "timeout", result
+    return "unsat", None
+
+
+def _portfolio_worker(problem, configuration, budget, connection):
+    # Processus fils : résoudre une configuration et renvoyer le résultat au processus principal
+    try:
+        connection.send(run_configuration(problem, configuration, budget=budget))
+    except Exception as error:
+        connection.send(("error", repr(error)))
+    finally:
+        connection.close()
+
+
+def solve_portfolio(problem, configurations=None, time_limit=None, processes=None, budget=None):
+    # Lancer plusieurs configurations en parallèle (un processus chacune, au plus `processes` à la fois) et retourner
+    # le premier résultat concluant : une solution, ou une preuve qu'il n'y en a pas. Les autres processus sont arrêtés.
+    # problem : fonction (ou classe) construisant le CSP à partir de var_heuristic et val_heuristic,
+    #           par exemple functools.partial(COLORING, file_path, nb_colors) ou functools.partial(N_QUEENS, n)
+    # configurations : liste de dictionnaires (var_heuristic, val_heuristic et options de solve), DEFAULT_PORTFOLIO par défaut
+    # budget : budget.Budget à la place de time_limit ; chaque processus reçoit l'échéance et les plafonds restants, et une
+    # annulation (depuis un autre thread) arrête tous les processus
+    # Retourne (solution ou "No solution found", configuration gagnante), ou (Timeout, None) si aucune configuration n'a
+    # conclu dans le budget (avec l'assignation partielle la plus profonde des configurations interrompues)
+    if configurations is None:
+        configurations = DEFAULT_PORTFOLIO
+    if processes is None:
+        processes = os.cpu_count() or 1
+    budget = as_budget(budget, time_limit)
+    context = multiprocessing.get_context()
+    pending = list(enumerate(configurations))
+    running = {}  # indice de la configuration -> (processus, extrémité de lecture du tube)
+    errors = []
+    timeout = None  # Timeout de la configuration interrompue la plus avancée
+    try:
+        while pending or running:
+            while pending and len(running) < processes:
+                index, configuration = pending.pop(0)
+                reader, writer = context.Pipe(duplex=False)
+                process = context.Process(target=_portfolio_worker, args=(problem, configuration, budget.child(), writer), daemon=True)
+                process.start()
+                writer.close()
+                running[index] = (process, reader)
+
+            # Attente par tranches courtes pour voir une annulation ou l'épuisement du budget du processus principal
+            remaining = budget.remaining()
+            ready = wait([reader for _, reader in running.values()] + [process.sentinel for process, _ in running.values()],
+                         timeout=0.1 if remaining is None else min(remaining, 0.1))
+            for index, (process, reader) in list(running.items()):
+                if reader not in ready and process.sentinel not in ready:
+                    continue
+                try:
+                    status, result = reader.recv()
+                except EOFError:
+                    status, result = "error", "worker exited without a result"
+                process.join()
+                reader.close()
+                del running[index]
+                if status == "solved":
+                    return result, configurations[index]
+                if status == "unsat":
+                    return "No solution found", configurations[index]
+                if status == "timeout":
+                    if timeout is None or len(result.partial) > len(timeout.partial):
+                        timeout = result
+                else:
+                    errors.append(result)
+            if running and budget.exhausted():
+                break
+    finally:
+        for process, reader in running.values():
+            process.terminate()
+            process.join()
+            reader.close()
+    if errors and len(errors) == len(configurations):
+        raise RuntimeError(f"Toutes les configurations ont échoué : {errors[0]}")
+    # Aucune configuration n'a conclu : ce n'est pas une preuve d'absence de solution
+    if timeout is None:
+        budget.exhausted()
+        return Timeout(budget.reason), None
+    return Timeout(budget.reason or timeout.reason, timeout.partial), None
+
+
+# Nombre de sous-problèmes visé par processus : davantage de sous-problèmes que de processus équilibre la charge,
+# car les sous-arbres ont des tailles très différentes
+SUBPROBLEMS_PER_PROCESS = 8
+REPORT_GRACE = 0.5  # attente maximale (secondes) des résultats des processus une fois le budget épuisé
+
+
+def split_search_space(csp, nb_subproblems, budget=None):
+    # Découper l'espace de recherche en sous-problèmes en fixant les premières variables (dans l'ordre de l'heuristique
+    # du CSP) : chaque sous-problème est un jeu de masques de domaines où les variables fixées sont réduites à un singleton,
+    # après propagation par cohérence d'arc. Les nœuds sont développés en largeur d'abord (de gauche à droite) jusqu'à
+    # obtenir au moins nb_subproblems sous-problèmes ; les sous-problèmes sans solution détectés par la propagation sont écartés.
+    # Retourne la liste des masques (vide si le problème n'a pas de solution), None si le budget est épuisé.
+    if csp.propagator is None:
+        csp.propagator = csp.make_propagator()
+    propagator = csp.propagator
+    root = csp.domains.copy()
+    result = propagator.propagate(root, budget=budget)
+    if result is None:
+        return None
+    if not result:
+        return []
+    frontier = deque([root])
+    nb_fixed = 0  # nombre de nœuds de la frontière dont toutes les variables sont fixées (rien à découper)
+    while frontier and len(frontier) < nb_subproblems and nb_fixed < len(frontier):
+        domains = frontier.popleft()
+        assignment = {var: domains.first(var) for var in csp.variables if domains.size(var) == 1}
+        if len(assignment) == len(csp.variables):
+            frontier.append(domains)
+            nb_fixed += 1
+            continue
+        nb_fixed = 0
+        csp.ordering = VariableOrdering(csp, csp.var_heuristic, domains, assignment)
+        var = csp.ordering.select()
+        for value in csp.order_domain_values(var, assignment, domains):
+            if budget is not None and budget.exhausted():
+                return None
+            child = domains.copy()
+            child.assign(var, value)
+            arcs = [(z, var, c) for z, c in propagator.incoming[var]]
+            result = propagator.propagate(child, arcs, budget=budget)
+            if result is None:
+                return None
+            if result:
+                frontier.append(child)
+    csp.ordering = None
+    return [domains.masks for domains in frontier]
+
+
+def _split_worker(csp, options, budget, connection):
+    # Processus fils : résoudre les sous-problèmes reçus un par un jusqu'à recevoir None
+    # Chaque résultat est renvoyé sous la forme (indice, statut, solution, statistiques) avec statut parmi "solved", "unsat",
+    # "timeout" ou "error"
+    try:
+        while True:
+            task = connection.recv()
+            if task is None:
+                break
+            index, masks = task
+            try:
+                csp.domains.masks = dict(masks)
+                csp.domains.trail = []
+                result = csp.solve(budget=budget, **options)
+                if isinstance(result, dict):
+                    connection.send((index, "solved", result, csp.stats.as_dict()))
+                elif isinstance(result, Timeout):
+                    connection.send((index, "timeout", result, csp.stats.as_dict()))
+                else:
+                    connection.send((index, "unsat", None, csp.stats.as_dict()))
+            except Exception as error:
+                connection.send((index, "error", repr(error), None))
+    except EOFError:
+        pass
+    finally:
+        connection.close()
+
+
+def solve_split(csp, processes=None, time_limit=None, subproblems_per_process=SUBPROBLEMS_PER_PROCESS, budget=None, **options):
+    # Résoudre un seul problème sur plusieurs cœurs : l'espace de recherche est découpé en sous-problèmes
+    # (split_search_space) distribués dynamiquement aux processus (un nouveau sous-problème dès qu'un processus est libre).
+    # Tout s'arrête dès qu'un sous-problème a une solution ; le problème n'a pas de solution si aucun sous-problème n'en a.
+    # options : options de solve() appliquées à chaque sous-problème
+    # budget : budget.Budget à la place de time_limit ; chaque processus reçoit l'échéance et les plafonds restants, et une
+    # annulation (depuis un autre thread) arrête tous les processus
+    # Retourne la solution, "No solution found" ou un Timeout (assignation partielle la plus profonde des sous-problèmes
+    # interrompus) ; csp.stats cumule les compteurs des sous-problèmes (le découpage compte comme prétraitement)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    budget = as_budget(budget, time_limit)
+    csp.timed_out = False
+    csp.timeout_reason = None
+    best_partial = {}
+    stats = SolveStats(build_time=csp.build_time)
+    phase_start = time.perf_counter()
+    subproblems = split_search_space(csp, processes * subproblems_per_process, budget=budget)
+    stats.preprocessing_time = time.perf_counter() - phase_start
+    csp.stats = stats
+    if subproblems is None:
+        csp.timed_out = True
+        csp.timeout_reason = budget.reason
+        return Timeout(budget.reason)
+    csp.search_stats = {"subproblems": len(subproblems), "subproblems_done": 0}
+    stats.search = csp.search_stats
+    if not subproblems:
+        return "No solution found"
+    phase_start = time.perf_counter()
+
+    context = multiprocessing.get_context()
+    pending = list(enumerate(subproblems))
+    workers = []  # (processus, extrémité du tube côté processus principal)
+    for _ in range(min(processes, len(subproblems))):
+        parent, child = context.Pipe()
+        process = context.Process(target=_split_worker, args=(csp, options, budget.child(), child), daemon=True)
+        process.start()
+        child.close()
+        workers.append((process, parent))
+    idle = list(workers)
+    errors = []
+    solution = "No solution found"
+    report_deadline = None  # après l'épuisement du budget : limite d'attente des Timeout des processus encore occupés
+    try:
+        while True:
+            while pending and idle and not csp.timed_out:
+                process, connection = idle.pop()
+                connection.send(pending.pop(0))
+            busy = [worker for worker in workers if worker not in idle]
+            if not busy:
+                break
+            # Attente par tranches courtes pour voir une annulation ou l'épuisement du budget du processus principal
+            if budget.exhausted():
+                if budget.reason == "cancelled":
+                    csp.timed_out = True
+                    break  # l'annulation n'est pas transmise aux processus : inutile d'attendre leurs résultats
+                csp.timed_out = True
+            if csp.timed_out:
+                # Les processus ont la même échéance : on lit les Timeout qu'ils envoient (avec leurs assignations
+                # partielles) avant de les arrêter, sans attendre plus de REPORT_GRACE secondes
+                if report_deadline is None:
+                    report_deadline = time.monotonic() + REPORT_GRACE
+                timeout = report_deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+            else:
+                remaining = budget.remaining()
+                timeout = 0.1 if remaining is None else min(remaining, 0.1)
+            ready = wait([connection for _, connection in busy] + [process.sentinel for process, _ in busy], timeout=timeout)
+            if not ready:
+                continue
+            for process, connection in busy:
+                if connection not in ready and process.sentinel not in ready:
+                    continue
+                try:
+                    _, status, result, subproblem_stats = connection.recv()
+                except EOFError:
+                    status, result, subproblem_stats = "error", "worker exited without a result", None
+                if subproblem_stats is not None:
+                    stats.merge(subproblem_stats)
+                    budget.nodes += subproblem_stats["nodes"]
+                if status == "error":
+                    errors.append(result)
+                    if not process.is_alive():
+                        workers.remove((process, connection))
+                        connection.close()
+                        continue
+                idle.append((process, connection))
+                csp.search_stats["subproblems_done"] += 1
+                if status == "solved":
+                    solution = result
+                elif status == "timeout":
+                    csp.timed_out = True
+                    budget.reason = budget.reason or result.reason
+                    if len(result.partial) > len(best_partial):
+                        best_partial = result.partial
+            if solution != "No solution found":
+                break
+            if not workers:
+                break
+    finally:
+        for process, connection in workers:
+            process.terminate()
+            process.join()
+            connection.close()
+        stats.search_time = time.perf_counter() - phase_start
+    if errors and solution == "No solution found" and not csp.timed_out:
+        raise RuntimeError(f"La résolution d'un sous-problème a échoué : {errors[0]}")
+    if solution == "No solution found" and csp.timed_out:
+        csp.timeout_reason = budget.reason
+        csp.best_partial = best_partial
+        return Timeout(budget.reason, best_partial)
+    return solution
@@ -1,14 +1,8 @@
 import os
-import time
-import json
 import csv
-import itertools
 import matplotlib.pyplot as plt
-from n_queens import N_QUEENS
-from coloring import dichotomic_search, COLORING
+from benchmark import run_benchmark, run_key
 
-
-minima_coloring = {"myciel3.col.txt": 4, "myciel4.col.txt": 5, "myciel5.col.txt": 6, "myciel6.col.txt": 7, "myciel7.col.txt": 8}
 # 12 colors for plots
 colors_plot = [
     "#1f77b4",  # Bleu (Blue)
@@ -25,73 +19,37 @@ colors_plot = [
     "#ff4451",  # Rouge vif (Bright Red)
 ]
 
-def plot_time_vs_instances_different_methods(instances, methods, type_problem="n_queens", fixed_parameters=["fc", "use_ac3"], time_limit=20, save=False, plot=True):
+def plot_time_vs_instances_different_methods(instances, methods, type_problem="n_queens", fixed_parameters=["fc", "use_ac3"], time_limit=20, save=False, plot=True, processes=None, memory_limit=None, resume=True, record_stats=False):
     """
     Plot the resolution time for each instance in instances for each method in methods
     :param instances: list of instances
     :param methods: list of methods (methods list of method={"use_ac3": True or False, "fc": True or False, "var_heuristic": "static" or "MRV" or "degree", "val_heuristic": "static" or "inverse" or "random"})
-    :param time_limit: time limit for the resolution
+    :param time_limit: time limit for the resolution (hard limit: the run is killed when it is exceeded)
     :param type_problem: type of problem to solve
-    :param save: if True, save the results to a CSV file
+    :param save: if True, append the results to a CSV file (runs already in the file are not run again if resume is True)
+    :param processes: number of runs in parallel (number of cores by default)
+    :param memory_limit: memory limit in bytes for one run
+    :param record_stats: if True, also save the solver statistics (nodes, backtracks, checks, ...) in the CSV file
     """
-    if save:
-        project_path = os.getcwd()
-        # Create a CSV file to save the results
-        file_path = os.path.join(project_path, "results", f"{type_problem}_results.csv")
-        csvfile = open(file_path, 'w', newline='')
-        fieldnames = ['instance', 'use_ac3', 'use_ac3_meanwhile', 'fc', 'var_heuristic', 'val_heuristic', 'execution_time']
-
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-    
-    times = {ind: [] for ind in range(len(methods))}
-    
-    
-    for ind, method in enumerate(methods):
-        for instance in instances:
-            if type_problem == "n_queens":
-                prob = N_QUEENS(instance, method["var_heuristic"], method["val_heuristic"])
-                start = time.time()
-                sol = prob.solve(use_ac3=method["use_ac3"], use_ac3_meanwhile=method["use_ac3_meanwhile"], fc=method["fc"], time_limit=time_limit)
-                end = time.time()
-            elif type_problem == "coloring":
-                start = time.time()
-                prob = COLORING(instance, minima_coloring[os.path.basename(instance)], method["var_heuristic"], method["val_heuristic"])
-                prob.solve(use_ac3=method["use_ac3"], use_ac3_meanwhile=method["use_ac3_meanwhile"], fc=method["fc"], time_limit=time_limit)
-                end = time.time()
-                
-            execution_time = end - start
-            times[ind].append(execution_time)
-            
-            print(f"Instance: {instance}, Method: {method}, Time: {execution_time:.4f} seconds")
-            
-            if save:
-                writer.writerow({
-                    'instance': instance,
-                    'use_ac3': method["use_ac3"],
-                    'use_ac3_meanwhile': method["use_ac3_meanwhile"],
-                    'fc': method["fc"],
-                    'var_heuristic': method["var_heuristic"],
-                    'val_heuristic': method["val_heuristic"],
-                    'execution_time': round(execution_time, 6)
-                })
-            if execution_time > time_limit:
-                break
-    
-    if save:
-        csvfile.close()
+    file_path = os.path.join(os.getcwd(), "results", f"{type_problem}_results.csv") if save else None
+    results = run_benchmark(type_problem, instances, methods, file_path=file_path, time_limit=time_limit, memory_limit=memory_limit, processes=processes, resume=resume, record_stats=record_stats)
+    # Timeouts and crashes are plotted at the time limit
+    times = {ind: [float(results[run_key(instance, method)]['execution_time']) if results[run_key(instance, method)]['status'] in ("solved", "unsat") else time_limit
+                   for instance in instances]
+             for ind, method in enumerate(methods)}
+
     if plot:
         # big figure
         plt.figure(figsize=(12, 8))
         for ind, method in enumerate(methods):
             label_method = [f"{key}={value}" for key, value in method.items() if key not in fixed_parameters]
-            valid_instances = instances[:len(times[ind])]
+            valid_instances = list(instances)
             if type_problem == "coloring":
                 # get only the name of the instance (without the path and extension)
                 valid_instances = [os.path.splitext(os.path.basename(instance))[0] for instance in valid_instances]
             plt.plot(valid_instances, times[ind], label=" , ".join(label_method), color=colors_plot[ind])
     
-        if max(max(times[ind]) for ind in range(len(methods))) > time_limit:
+        if max(max(times[ind]) for ind in range(len(methods))) >= time_limit:
             plt.axhline(y=time_limit, color='r', linestyle='--', label="Time limit")
         plt.xlabel("Instance")
         plt.ylabel("Time (s)")
@@ -108,62 +66,65 @@ def plot_time_vs_instances_different_methods(instances, methods, type_problem="n
 
 coloring_instances = ["myciel3.col.txt", "myciel4.col.txt", "myciel5.col.txt", "myciel6.col.txt", "myciel7.col.txt"]
 coloring_instances = [os.path.join("instances", "coloring", instance) for instance in coloring_instances]
-type_problem = "coloring"
-for use_ac3_meanwhile in [True, False]:
-    for fc in [False]:
-        methods = []
-        for var_heuristic in ["static", "MRV", "degree"]:
-        # for var_heuristic in ["static", "MRV"]:
-            for val_heuristic in ["static", "inverse", "random", "LCV"]:
-            # for val_heuristic in ["static"]:
-                print(use_ac3_meanwhile, fc, var_heuristic, val_heuristic)
-                methods += [{"use_ac3": False, "use_ac3_meanwhile": use_ac3_meanwhile, "fc": fc, "var_heuristic": var_heuristic, "val_heuristic": val_heuristic}]
-        plot_time_vs_instances_different_methods(coloring_instances, methods, type_problem, fixed_parameters=["fc", "use_ac3_meanwhile"], time_limit=3, save=True, plot=True)
-
-
-
 queen_instances = range(4, 26)
-type_problem = "n_queens"
-
-for use_ac3_meanwhile in [True, False]:
-    for fc in [False]:
-        methods = []
-        for var_heuristic in ["static", "MRV", "degree"]:
-        # for var_heuristic in ["static"]:
-            for val_heuristic in ["static", "inverse", "random", "LCV"]:
-            # for val_heuristic in ["static"]:
-                print(use_ac3_meanwhile, fc, var_heuristic, val_heuristic)
-                methods += [{"use_ac3": False, "use_ac3_meanwhile": use_ac3_meanwhile, "fc": fc, "var_heuristic": var_heuristic, "val_heuristic": val_heuristic}]
-        plot_time_vs_instances_different_methods(queen_instances, methods, type_problem, fixed_parameters=["fc", "use_ac3"], time_limit=20, save=True, plot=True)
-
-exit()
-
-for use_ac3 in [True, False]:
-    for fc in [True, False]:
-        methods = []
-        for var_heuristic in ["static", "MRV", "degree"]:
-        # for var_heuristic in ["static", "MRV"]:
-            for val_heuristic in ["static", "inverse", "random", "LCV"]:
-            # for val_heuristic in ["static"]:
-                print(use_ac3, fc, var_heuristic, val_heuristic)
-                methods += [{"use_ac3": use_ac3, "fc": fc, "var_heuristic": var_heuristic, "val_heuristic": val_heuristic}]
-        plot_time_vs_instances_different_methods(coloring_instances, methods, type_problem, fixed_parameters=["fc", "use_ac3"], time_limit=3, save=True, plot=True)
-
 
 
-queen_instances = range(4, 26)
-type_problem = "n_queens"
-
-for use_ac3 in [True, False]:
-    for fc in [True, False]:
-        methods = []
-        for var_heuristic in ["static", "MRV", "degree"]:
-        # for var_heuristic in ["static"]:
-            for val_heuristic in ["static", "inverse", "random", "LCV"]:
-            # for val_heuristic in ["static"]:
-                print(use_ac3, fc, var_heuristic, val_heuristic)
-                methods += [{"use_ac3": use_ac3, "fc": fc, "var_heuristic": var_heuristic, "val_heuristic": val_heuristic}]
-        plot_time_vs_instances_different_methods(queen_instances, methods, type_problem, fixed_parameters=["fc", "use_ac3"], time_limit=20, save=True, plot=True)
+def run_ac3_meanwhile_experiments():
+    """
+    Compare the heuristics with and without maintained arc consistency (use_ac3_meanwhile) on coloring and N-queens
+    """
+    type_problem = "coloring"
+    for use_ac3_meanwhile in [True, False]:
+        for fc in [False]:
+            methods = []
+            for var_heuristic in ["static", "MRV", "degree"]:
+            # for var_heuristic in ["static", "MRV"]:
+                for val_heuristic in ["static", "inverse", "random", "LCV"]:
+                # for val_heuristic in ["static"]:
+                    print(use_ac3_meanwhile, fc, var_heuristic, val_heuristic)
+                    methods += [{"use_ac3": False, "use_ac3_meanwhile": use_ac3_meanwhile, "fc": fc, "var_heuristic": var_heuristic, "val_heuristic": val_heuristic}]
+            plot_time_vs_instances_different_methods(coloring_instances, methods, type_problem, fixed_parameters=["fc", "use_ac3_meanwhile"], time_limit=3, save=True, plot=True)
+
+    type_problem = "n_queens"
+    for use_ac3_meanwhile in [True, False]:
+        for fc in [False]:
+            methods = []
+            for var_heuristic in ["static", "MRV", "degree"]:
+            # for var_heuristic in ["static"]:
+                for val_heuristic in ["static", "inverse", "random", "LCV"]:
+                # for val_heuristic in ["static"]:
+                    print(use_ac3_meanwhile, fc, var_heuristic, val_heuristic)
+                    methods += [{"use_ac3": False, "use_ac3_meanwhile": use_ac3_meanwhile, "fc": fc, "var_heuristic": var_heuristic, "val_heuristic": val_heuristic}]
+            plot_time_vs_instances_different_methods(queen_instances, methods, type_problem, fixed_parameters=["fc", "use_ac3"], time_limit=20, save=True, plot=True)
+
+
+def run_ac3_fc_experiments():
+    """
+    Compare the heuristics with and without AC3 preprocessing and forward checking on coloring and N-queens
+    """
+    type_problem = "coloring"
+    for use_ac3 in [True, False]:
+        for fc in [True, False]:
+            methods = []
+            for var_heuristic in ["static", "MRV", "degree"]:
+            # for var_heuristic in ["static", "MRV"]:
+                for val_heuristic in ["static", "inverse", "random", "LCV"]:
+                # for val_heuristic in ["static"]:
+                    print(use_ac3, fc, var_heuristic, val_heuristic)
+                    methods += [{"use_ac3": use_ac3, "use_ac3_meanwhile": False, "fc": fc, "var_heuristic": var_heuristic, "val_heuristic": val_heuristic}]
+            plot_time_vs_instances_different_methods(coloring_instances, methods, type_problem, fixed_parameters=["fc", "use_ac3"], time_limit=3, save=True, plot=True)
+
+    type_problem = "n_queens"
+    for use_ac3 in [True, False]:
+        for fc in [True, False]:
+            methods = []
+            for var_heuristic in ["static", "MRV", "degree"]:
+            # for var_heuristic in ["static"]:
+                for val_heuristic in ["static", "inverse", "random", "LCV"]:
+                # for val_heuristic in ["static"]:
+                    print(use_ac3, fc, var_heuristic, val_heuristic)
+                    methods += [{"use_ac3": use_ac3, "use_ac3_meanwhile": False, "fc": fc, "var_heuristic": var_heuristic, "val_heuristic": val_heuristic}]
+            plot_time_vs_instances_different_methods(queen_instances, methods, type_problem, fixed_parameters=["fc", "use_ac3"], time_limit=20, save=True, plot=True)
 
 
 def plot_from_csv(type_problem):
@@ -238,3 +199,6 @@ def plot_from_csv(type_problem):
     plt.legend()
     plt.show()
 
+
+if __name__ == "__main__":
+    run_ac3_meanwhile_experiments()
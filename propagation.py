@@ -0,0 +1,81 @@
+from collections import deque
+
+
+class AC2001:
+    # Moteur de cohérence d'arc de type AC-2001/AC-3.1 :
+    # - file à double entrée avec un ensemble des arcs présents (pas de doublons, retrait en O(1))
+    # - seuls les arcs portant une contrainte sont mis en file
+    # - le dernier support trouvé pour chaque valeur a de x sur l'arc (x, y) est mémorisé et revérifié en O(1) avant toute recherche
+    # Les supports mémorisés restent de simples indices (supports résiduels) : ils sont revérifiés avant usage,
+    # donc ils restent corrects quand les domaines sont restaurés après un retour arrière.
+    def __init__(self, csp):
+        self.csp = csp
+        # Arcs entrants : pour chaque variable x, les couples (z, contrainte de z vers x) à revoir quand x change
+        self.incoming = {var: [] for var in csp.variables}
+        for z in csp.variables:
+            for x, c in csp.neighbors[z]:
+                self.incoming[x].append((z, c))
+        self.last_support = {}  # (x, y) -> {a: dernier support b de a dans le domaine de y}
+        self.revisions = 0  # nombre de révisions d'arcs effectuées
+        self.checks = 0  # nombre de tests de contraintes effectués
+        self.prunings = 0  # nombre de valeurs retirées des domaines
+        self.failed_arc = None  # dernier arc (x, y) ayant vidé le domaine de x
+
+    def revise(self, x, y, constraint, domains):
+        # Retirer du domaine de x les valeurs sans support dans le domaine de y, retourne True si le domaine a changé
+        self.revisions += 1
+        residues = self.last_support.get((x, y))
+        if residues is None:
+            residues = self.last_support[(x, y)] = {}
+        mask_y = domains.masks[y]
+        bit_of_y = domains.bit_of[y]
+        values_y = domains.values[y]
+        checks = 0
+        removed = False
+        for a in domains[x]:
+            b = residues.get(a)
+            if b is not None and mask_y & bit_of_y[b]:
+                continue  # Le support mémorisé est toujours valide
+            mask = mask_y
+            while mask:
+                low = mask & -mask
+                b = values_y[low.bit_length() - 1]
+                checks += 1
+                if constraint.check(a, b):
+                    residues[a] = b
+                    break
+                mask ^= low
+            else:
+                domains.remove(x, a)
+                self.prunings += 1
+                removed = True
+        self.checks += checks
+        return removed
+
+    def propagate(self, domains, arcs=None, budget=None):
+        # Propager jusqu'au point fixe à partir des arcs donnés (tous les arcs si None)
+        # Retourne True si cohérent, False si un domaine est vidé, None si le budget (budget.Budget) est épuisé
+        incoming = self.incoming
+        if arcs is None:
+            arcs = [(x, y, c) for x in self.csp.variables for y, c in self.csp.neighbors[x]]
+        queue = deque()
+        in_queue = set()
+        for x, y, c in arcs:
+            if (x, y) not in in_queue:
+                queue.append((x, y, c))
+                in_queue.add((x, y))
+        while queue:
+            if budget is not None and budget.exhausted():
+                return None
+            x, y, constraint = queue.popleft()
+            in_queue.discard((x, y))
+            if self.revise(x, y, constraint, domains):
+                if domains.is_empty(x):
+                    self.failed_arc = (x, y)
+                    return False
+                # Le domaine de x a diminué : revoir les arcs (z, x) de ses voisins
+                for z, c in incoming[x]:
+                    if z != y and (z, x) not in in_queue:
+                        queue.append((z, x, c))
+                        in_queue.add((z, x))
+        return True
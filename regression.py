@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import multiprocessing
+import numpy as np
+from graph import load_col
+from benchmark import run_one, minima_coloring
+from budget import memory_usage
+
+try:
+    import resource
+except ImportError:  # Windows: no peak memory measurement
+    resource = None
+
+
+BASELINE_SCHEMA = 1
+DEFAULT_BASELINE = os.path.join("results", "baselines.json")
+DEFAULT_METHOD = {"use_ac3": True, "fc": True, "use_ac3_meanwhile": False, "var_heuristic": "MRV", "val_heuristic": "static"}
+QUEENS_SIZES = [8, 12, 16, 24, 32, 48, 64]
+PERCENTILES = [10, 50, 90]
+
+
+def default_cases(method=None, queens_sizes=QUEENS_SIZES, coloring_dir=os.path.join("instances", "coloring")):
+    """
+    Benchmark cases of the regression suite: every coloring instance whose chromatic number is known (benchmark.minima_coloring)
+    and a range of N_QUEENS sizes, all solved with the same method
+    :param method: solve() options with "var_heuristic" and "val_heuristic" (DEFAULT_METHOD by default)
+    :return: list of cases (dictionaries with "name", "type_problem", "instance", "size" and "method"); "size" is the x axis of
+             the scaling fit: n for N_QUEENS, number of edges for coloring
+    """
+    method = dict(DEFAULT_METHOD if method is None else method)
+    cases = []
+    for file_name in sorted(minima_coloring):
+        path = os.path.join(coloring_dir, file_name)
+        if os.path.exists(path):
+            cases.append({"name": f"coloring/{file_name}", "type_problem": "coloring", "instance": path,
+                          "size": load_col(path).number_of_edges(), "method": method})
+    for n in queens_sizes:
+        cases.append({"name": f"n_queens/{n}", "type_problem": "n_queens", "instance": n, "size": n, "method": method})
+    return cases
+
+
+def _measure_worker(type_problem, instance, method, time_limit, connection):
+    # Child process: one run, reported as (status, time, nodes, peak memory increase in bytes)
+    try:
+        sys.stdout = open(os.devnull, 'w')
+        start_memory = memory_usage()
+        status, execution_time, _, stats = run_one(type_problem, instance, method, time_limit)
+        peak_memory = None
+        if resource is not None and start_memory is not None:
+            peak_memory = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - start_memory, 0)
+        connection.send((status, execution_time, None if stats is None else stats["nodes"], peak_memory))
+    except BaseException as error:
+        connection.send(("crash", None, None, None, repr(error)))
+    finally:
+        connection.close()
+
+
+def measure_case(case, repeats=5, time_limit=60):
+    """
+    Run one case several times, each run in a fresh process killed after time_limit seconds
+    :return: dictionary with the status of the runs ("solved", "unsat", or the first other status met), the time percentiles
+             ("p10", "p50", "p90", in seconds, model construction included), the median node count and the largest peak memory
+             increase in bytes (None where unavailable)
+    """
+    context = multiprocessing.get_context()
+    statuses, times, nodes, memories = [], [], [], []
+    for _ in range(repeats):
+        reader, writer = context.Pipe(duplex=False)
+        process = context.Process(target=_measure_worker, args=(case["type_problem"], case["instance"], case["method"], time_limit, writer), daemon=True)
+        start = time.time()
+        process.start()
+        writer.close()
+        if reader.poll(None if time_limit is None else time_limit):
+            try:
+                status, execution_time, run_nodes, peak_memory = reader.recv()[:4]
+            except EOFError:  # killed by the system before reporting
+                status, execution_time, run_nodes, peak_memory = "crash", None, None, None
+        else:
+            process.kill()
+            status, execution_time, run_nodes, peak_memory = "timeout", None, None, None
+        process.join()
+        reader.close()
+        statuses.append(status)
+        times.append(time.time() - start if execution_time is None else execution_time)
+        if run_nodes is not None:
+            nodes.append(run_nodes)
+        if peak_memory is not None:
+            memories.append(peak_memory)
+    status = next((status for status in statuses if status not in ("solved", "unsat")), statuses[0])
+    result = {"status": status, "repeats": repeats, "size": case["size"]}
+    result.update({f"p{q}": float(value) for q, value in zip(PERCENTILES, np.percentile(times, PERCENTILES))})
+    result["nodes"] = int(np.median(nodes)) if nodes else None
+    result["peak_memory"] = max(memories) if memories else None
+    return result
+
+
+def fit_scaling(sizes, times):
+    """
+    Fit time = coefficient * size ** exponent by least squares in log-log scale
+    :return: (exponent, coefficient), or None with fewer than two distinct sizes
+    """
+    points = [(size, t) for size, t in zip(sizes, times) if size > 0 and t > 0]
+    if len({size for size, _ in points}) < 2:
+        return None
+    exponent, log_coefficient = np.polyfit(np.log([size for size, _ in points]), np.log([t for _, t in points]), 1)
+    return float(exponent), float(np.exp(log_coefficient))
+
+
+def scaling_curves(results):
+    """
+    Fit one scaling curve per problem type (time vs n for N_QUEENS, time vs |E| for coloring) on the cases that finished
+    :param results: dictionary case name -> measure_case result
+    :return: dictionary problem type -> {"exponent", "coefficient", "points"}
+    """
+    curves = {}
+    for type_problem in sorted({name.split("/")[0] for name in results}):
+        finished = [result for name, result in results.items() if name.split("/")[0] == type_problem and result["status"] in ("solved", "unsat")]
+        fit = fit_scaling([result["size"] for result in finished], [result["p50"] for result in finished])
+        if fit is not None:
+            curves[type_problem] = {"exponent": fit[0], "coefficient": fit[1], "points": len(finished)}
+    return curves
+
+
+def current_version():
+    # Label of the measured code: the current git commit if available, otherwise the date
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return time.strftime("%Y-%m-%d")
+
+
+def load_baselines(file_path=DEFAULT_BASELINE):
+    """
+    Read the baseline file: {"schema": BASELINE_SCHEMA, "current": version, "versions": {version: {"created", "cases", "scaling"}}}
+    :return: the file content (an empty structure if the file does not exist)
+    """
+    if not os.path.exists(file_path):
+        return {"schema": BASELINE_SCHEMA, "current": None, "versions": {}}
+    with open(file_path) as file:
+        baselines = json.load(file)
+    if baselines.get("schema") != BASELINE_SCHEMA:
+        raise ValueError(f"Unsupported baseline schema {baselines.get('schema')} in {file_path} (expected {BASELINE_SCHEMA})")
+    return baselines
+
+
+def save_baseline(results, curves, version, file_path=DEFAULT_BASELINE):
+    """
+    Store the results of a run as the baseline of version (kept next to the other versions) and make it the current baseline
+    """
+    baselines = load_baselines(file_path)
+    baselines["versions"][version] = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "cases": results, "scaling": curves}
+    baselines["current"] = version
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, 'w') as file:
+        json.dump(baselines, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, file_path)
+
+
+def compare(results, curves, baseline, threshold=0.25, min_time=0.05, exponent_tolerance=0.3):
+    """
+    Compare a run with a baseline
+    :param threshold: relative increase of the median time, of the node count or of the peak memory flagged as a regression
+    :param min_time: time differences below this many seconds are ignored (timer noise on very short cases)
+    :param exponent_tolerance: increase of a scaling exponent flagged as an asymptotic regression
+    :return: list of regressions (dictionaries with "case", "metric", "baseline" and "current")
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline["cases"].get(name)
+        if reference is None:
+            continue
+        if reference["status"] in ("solved", "unsat") and result["status"] != reference["status"]:
+            regressions.append({"case": name, "metric": "status", "baseline": reference["status"], "current": result["status"]})
+            continue
+        if result["p50"] > reference["p50"] * (1 + threshold) and result["p50"] - reference["p50"] > min_time:
+            regressions.append({"case": name, "metric": "p50", "baseline": reference["p50"], "current": result["p50"]})
+        for metric in ("nodes", "peak_memory"):
+            if reference.get(metric) and result.get(metric) is not None and result[metric] > reference[metric] * (1 + threshold):
+                regressions.append({"case": name, "metric": metric, "baseline": reference[metric], "current": result[metric]})
+    for type_problem, curve in curves.items():
+        reference = baseline.get("scaling", {}).get(type_problem)
+        if reference is not None and curve["exponent"] > reference["exponent"] + exponent_tolerance:
+            regressions.append({"case": type_problem, "metric": "scaling exponent", "baseline": reference["exponent"], "current": curve["exponent"]})
+    return regressions
+
+
+def run_suite(cases=None, repeats=5, time_limit=60, baseline_path=DEFAULT_BASELINE, baseline_version=None, threshold=0.25,
+              update_baseline=False, version=None):
+    """
+    Run the regression suite and compare it with a stored baseline
+    :param cases: cases to run (default_cases() by default)
+    :param repeats: number of runs of each case
+    :param time_limit: wall-clock limit in seconds for one run
+    :param baseline_version: version of the baseline to compare with (the current baseline of the file by default)
+    :param threshold: see compare
+    :param update_baseline: if True, store this run as the baseline of version and make it the current one
+    :param version: label of the measured code (current_version() by default)
+    :return: (results, scaling curves, regressions); regressions is empty when there is no baseline to compare with
+    """
+    if cases is None:
+        cases = default_cases()
+    results = {}
+    for case in cases:
+        results[case["name"]] = measure_case(case, repeats=repeats, time_limit=time_limit)
+        result = results[case["name"]]
+        nodes = "-" if result["nodes"] is None else result["nodes"]
+        print(f"{case['name']}: {result['status']}, median {result['p50']:.4f} s (p10 {result['p10']:.4f}, p90 {result['p90']:.4f}), nodes {nodes}")
+    curves = scaling_curves(results)
+    for type_problem, curve in curves.items():
+        print(f"scaling {type_problem}: time ~ {curve['coefficient']:.3g} * size^{curve['exponent']:.2f}")
+
+    baselines = load_baselines(baseline_path)
+    baseline_version = baseline_version or baselines["current"]
+    regressions = []
+    if baseline_version is not None:
+        regressions = compare(results, curves, baselines["versions"][baseline_version], threshold=threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['case']} {regression['metric']}: {regression['baseline']} -> {regression['current']} (baseline {baseline_version})")
+    if update_baseline:
+        save_baseline(results, curves, version or current_version(), baseline_path)
+    return results, curves, regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark regression suite (coloring instances and N_QUEENS sizes)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative increase flagged as a regression")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--against", default=None, help="baseline version to compare with (current one by default)")
+    parser.add_argument("--update", action="store_true", help="store this run as the baseline of the current version")
+    args = parser.parse_args()
+    _, _, found = run_suite(repeats=args.repeats, time_limit=args.time_limit, baseline_path=args.baseline, baseline_version=args.against,
+                            threshold=args.threshold, update_baseline=args.update)
+    sys.exit(1 if found else 0)
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import pickle
+import sqlite3
+import hashlib
+from stats import SolveStats
+
+DEFAULT_CACHE_PATH = os.path.join("results", "solve_cache.sqlite")
+
+
+class ResultCache:
+    # Cache sur disque (SQLite) des résultats de solve() : la clé est l'empreinte du contenu de l'instance (CSP.fingerprint)
+    # et des paramètres de résolution. Chaque entrée garde le statut ("solved" ou "unsat"), la solution et les statistiques.
+    # - le nombre d'entrées est borné (max_entries), les moins récemment utilisées sont évincées en premier (LRU)
+    # - quand le fichier d'une instance change, son empreinte change : les entrées de l'ancienne version de ce fichier
+    #   (csp.source()) sont supprimées à la première écriture (et ne pouvaient de toute façon plus être retrouvées)
+    # - une solution relue est revérifiée (csp.is_feasible) avant d'être retournée, une entrée invalide est supprimée
+    # Les résultats interrompus par le budget (Timeout) ne sont jamais mis en cache.
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY, source TEXT, version TEXT, status TEXT, solution BLOB, stats TEXT, last_used REAL)""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_source ON results (source)")
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    @staticmethod
+    def make_key(csp, instance, options):
+        # Clé d'une résolution : empreinte de l'instance, options de solve() et heuristiques du modèle (sérialisées de façon canonique)
+        options = dict(options, var_heuristic=csp.var_heuristic, val_heuristic=csp.val_heuristic, backend=csp.backend)
+        return hashlib.sha256((instance + json.dumps(options, sort_keys=True, default=repr)).encode()).hexdigest()
+
+    def get(self, csp, options, instance=None):
+        # Résultat en cache (solution ou "No solution found", statistiques) pour ce problème et ces paramètres, None si absent
+        # instance : empreinte du problème si elle est déjà calculée (csp.fingerprint())
+        instance = csp.fingerprint() if instance is None else instance
+        if instance is None:
+            return None
+        key = self.make_key(csp, instance, options)
+        row = self.connection.execute("SELECT status, solution, stats FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        status, solution, stats = row
+        result = pickle.loads(solution) if status == "solved" else "No solution found"
+        if status == "solved" and not csp.is_feasible(result):
+            # Entrée corrompue ou modèle modifié sans changer d'empreinte : on l'oublie
+            self.connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            self.connection.commit()
+            self.misses += 1
+            return None
+        self.connection.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.connection.commit()
+        self.hits += 1
+        return result, SolveStats(**json.loads(stats))
+
+    def put(self, csp, options, result, stats, instance=None):
+        # Enregistrer un résultat concluant (solution ou preuve d'absence de solution), puis évincer les entrées en trop
+        instance = csp.fingerprint() if instance is None else instance
+        if instance is None or not (isinstance(result, dict) or result == "No solution found"):
+            return False
+        key = self.make_key(csp, instance, options)
+        status = "solved" if isinstance(result, dict) else "unsat"
+        source, version = csp.source() or (None, None)
+        with self.connection:
+            if source is not None:
+                self.connection.execute("DELETE FROM results WHERE source = ? AND version != ?", (source, version))
+            self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                    (key, source, version, status, pickle.dumps(result) if status == "solved" else None,
+                                     json.dumps(stats.as_dict()), time.time()))
+            extra = self.connection.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+            if extra > 0:
+                self.connection.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used LIMIT ?)", (extra,))
+        return True
+
+    def solve(self, csp, options, **run_options):
+        # Résoudre avec le cache : retourne le résultat en cache s'il existe, sinon résout (csp.solve(**options, **run_options))
+        # et enregistre le résultat. run_options (limite de temps, budget, fonctions de suivi) ne font pas partie de la clé.
+        # csp.stats contient les statistiques de la résolution d'origine, avec search["cache_hit"] = True en cas de succès.
+        instance = csp.fingerprint()  # avant la résolution, qui peut réduire les domaines sur place
+        cached = None if instance is None else self.get(csp, options, instance)
+        if cached is not None:
+            result, stats = cached
+            stats.search["cache_hit"] = True
+            csp.stats = stats
+            csp.timed_out = False
+            return result
+        result = csp.solve(**options, **run_options)
+        if instance is not None:
+            self.put(csp, options, result, csp.stats, instance)
+        return result
@@ -0,0 +1,349 @@
+from collections import OrderedDict
+from heuristics import VariableOrdering
+
+
+def luby(i):
+    # i-ème terme (à partir de 1) de la suite de Luby : 1 1 2 1 1 2 4 1 1 2 1 1 2 4 8 ...
+    while True:
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1
+
+
+def restart_cutoff(strategy, run, base=100, factor=1.5):
+    # Nombre d'échecs autorisés pour le run-ième essai (à partir de 1) selon la stratégie de redémarrage
+    if strategy == "luby":
+        return base * luby(run)
+    if strategy == "geometric":
+        return int(base * factor ** (run - 1))
+    raise ValueError("Stratégie de redémarrage non reconnue. Choisissez entre 'luby' ou 'geometric'.")
+
+
+class NogoodStore:
+    # Nogoods appris pendant la recherche : assignations partielles {(variable, valeur)} sans solution.
+    # Leur taille est bornée (max_size littéraux) ainsi que leur nombre (capacity), les moins récemment utilisés
+    # sont évincés en premier. Chaque nogood est indexé par ses littéraux pour être testé à l'assignation.
+    def __init__(self, capacity=1000, max_size=10):
+        self.capacity = capacity
+        self.max_size = max_size
+        self.nogoods = OrderedDict()  # nogood (frozenset de littéraux) -> None, dans l'ordre d'utilisation
+        self.watch = {}  # littéral (variable, valeur) -> nogoods qui le contiennent
+        self.learned = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.nogoods)
+
+    def add(self, literals):
+        # Enregistrer un nogood, retourne False s'il est trop grand ou déjà connu
+        nogood = frozenset(literals)
+        if not nogood or len(nogood) > self.max_size or nogood in self.nogoods:
+            return False
+        self.nogoods[nogood] = None
+        for literal in nogood:
+            self.watch.setdefault(literal, set()).add(nogood)
+        self.learned += 1
+        while len(self.nogoods) > self.capacity:
+            old, _ = self.nogoods.popitem(last=False)
+            for literal in old:
+                self.watch[literal].discard(old)
+            self.evicted += 1
+        return True
+
+    def violated(self, var, value, assignment):
+        # Nogood entièrement satisfait si l'on ajoute var = value à l'assignation (None s'il n'y en a pas)
+        for nogood in self.watch.get((var, value), ()):
+            if all(other_var == var or (other_var in assignment and assignment[other_var] == other_value) for other_var, other_value in nogood):
+                self.nogoods.move_to_end(nogood)
+                return nogood
+        return None
+
+
+class Search:
+    # Recherche par backtracking itérative : la pile explicite remplace la récursion (pas de limite de récursion de
+    # Python), la mémoire est bornée par la profondeur et les solutions sont produites à la demande par un générateur.
+    # Les domaines sont filtrés sur place et restaurés grâce au journal des domaines au retour arrière.
+    # Avec backjumping=True, chaque niveau mémorise son ensemble de conflits (CBJ) : quand toutes ses valeurs échouent,
+    # la recherche remonte directement à la variable la plus profonde de cet ensemble ; si nogoods est un NogoodStore,
+    # les ensembles de conflits de taille bornée y sont appris et coupent immédiatement les assignations qui les contiennent.
+    # Avec fail_limit, la recherche s'arrête (cutoff_reached) après ce nombre d'échecs, pour les redémarrages ; weights
+    # (poids dom/wdeg) et phases (dernière valeur de chaque variable, essayée en premier) peuvent venir d'un essai précédent.
+    # Avec symmetry_breaking=True, les symétries déclarées par le CSP sont cassées : valeurs interchangeables (une nouvelle
+    # valeur ne peut être que la plus petite valeur encore inutilisée) et symétries de variables (seules les assignations
+    # lexicographiquement plus petites que toutes leurs images sont gardées, lex-leader). Une seule solution par classe
+    # de symétrie est alors produite.
+    # on_node(var, value, profondeur), on_backtrack(var, profondeur) et on_solution(solution) sont appelées à chaque valeur
+    # essayée, à chaque niveau épuisé et à chaque solution ; la profondeur est le nombre de niveaux de la pile.
+    # La plus profonde assignation partielle atteinte est copiée dans csp.best_partial (au moment de la quitter, pour ne
+    # pas copier l'assignation à chaque nouveau niveau) : c'est le résultat partiel retourné quand le budget est épuisé.
+    def __init__(self, csp, domains, assignment=None, use_ac3_meanwhile=False, fc=False, budget=None, backjumping=False, nogoods=None,
+                 fail_limit=None, weights=None, phases=None, rng=None, stats=None, symmetry_breaking=False, on_node=None, on_backtrack=None, on_solution=None):
+        self.csp = csp
+        self.domains = domains
+        self.assignment = assignment if assignment is not None else {}
+        self.use_ac3_meanwhile = use_ac3_meanwhile
+        self.fc = fc
+        self.budget = budget  # budget.Budget (None : sans limite)
+        self.backjumping = backjumping or nogoods is not None
+        self.nogoods = nogoods
+        self.timed_out = False  # True si la recherche s'est arrêtée sur le budget (temps, nœuds, mémoire, annulation)
+        self.peak = False  # True si l'assignation courante est la plus profonde atteinte et pas encore sauvegardée
+        self.fail_limit = fail_limit
+        self.failures = 0
+        self.cutoff_reached = False  # True si la recherche s'est arrêtée sur la limite d'échecs
+        self.phases = phases
+        self.on_node = on_node
+        self.on_backtrack = on_backtrack
+        self.on_solution = on_solution
+        self.stats = stats if stats is not None else {}  # Statistiques (éventuellement cumulées sur plusieurs essais)
+        for key in ("nodes", "backtracks", "max_depth", "backjumps", "levels_skipped", "nogood_prunings", "symmetry_prunings"):
+            self.stats.setdefault(key, 0)
+        self.value_symmetry = symmetry_breaking and csp.interchangeable_values
+        self.lex_symmetry = symmetry_breaking and bool(csp.symmetry_images({}))
+        # Valeurs interchangeables : plus grande position (dans le domaine initial) des valeurs déjà utilisées
+        self.max_position = max((self.position(var, value) for var, value in self.assignment.items()), default=-1)
+        self.ordering = VariableOrdering(csp, csp.var_heuristic, domains, self.assignment, weights=weights, rng=rng)
+        csp.ordering = self.ordering
+        # Sans propagation, MRV et dom/wdeg ont besoin des domaines filtrés par l'assignation courante :
+        # on les filtre comme le forward checking, sans échouer immédiatement (la variable vidée sera choisie ensuite)
+        self.filter_only = self.ordering.uses_domains and not fc and not use_ac3_meanwhile
+        self.stack = []  # niveaux : [variable, valeurs, position, marque du journal, conflits, variables filtrées, max_position précédent]
+        self.level_of = {}  # variable assignée -> indice de son niveau dans la pile
+
+    def position(self, var, value):
+        # Position de la valeur dans le domaine initial de la variable
+        return self.domains.bit_of[var][value].bit_length() - 1
+
+    def lex_leader(self, var, value):
+        # Vérifier que l'assignation courante complétée par var = value peut encore être lexicographiquement plus petite
+        # ou égale à chacune de ses images par les symétries de variables (comparaison dans l'ordre des variables du CSP,
+        # indécise dès qu'une des deux valeurs comparées n'est pas encore assignée)
+        assignment = self.assignment
+        assignment[var] = value
+        try:
+            variables = self.csp.variables
+            for image in self.csp.symmetry_images(assignment):
+                for other_var in variables:
+                    a = assignment.get(other_var)
+                    b = image.get(other_var)
+                    if a is None or b is None or a < b:
+                        break
+                    if a > b:
+                        return False
+            return True
+        finally:
+            del assignment[var]
+
+    def propagate(self, var, value):
+        # Filtrer les domaines après l'assignation var = value, retourne False en cas d'échec
+        csp = self.csp
+        if self.fc or self.filter_only:
+            if not csp.forward_checking(var, value, self.assignment, self.domains) and self.fc:
+                return False
+        if self.use_ac3_meanwhile and not csp.ac3_meanwhile(var, value, self.assignment, self.domains):
+            return False
+        return True
+
+    def find_conflict(self, var, value):
+        # Variable assignée la moins profonde en conflit avec var = value (None si la valeur est consistante)
+        culprit = None
+        assignment = self.assignment
+        level_of = self.level_of
+        for other_var, constraint in self.csp.neighbors[var]:
+            if other_var in assignment and not constraint.check(value, assignment[other_var]):
+                if culprit is None or level_of.get(other_var, -1) < level_of.get(culprit, -1):
+                    culprit = other_var
+        return culprit
+
+    def pruned_by(self, var):
+        # Variables assignées responsables des retraits dans le domaine de var.
+        # Avec le forward checking, un retrait fait au niveau i est dû à la seule variable de ce niveau ; avec MAC il
+        # peut dépendre de tous les retraits précédents, on retient donc toutes les variables jusqu'au niveau i.
+        reasons = set()
+        deepest = -1
+        for level, frame in enumerate(self.stack):
+            if frame[3] is not None and var in frame[5]:
+                reasons.add(frame[0])
+                deepest = level
+        if self.use_ac3_meanwhile and deepest >= 0:
+            reasons.update(frame[0] for frame in self.stack[:deepest + 1] if frame[3] is not None)
+        reasons.discard(var)
+        return reasons
+
+    def failure_explanation(self):
+        # Ensemble de conflits après un échec de propagation (domaine vidé)
+        wiped_var = self.csp.failed_arc[0]
+        if self.use_ac3_meanwhile:
+            return set(self.level_of)
+        return self.pruned_by(wiped_var)
+
+    def backjump(self, conflicts):
+        # Remonter au niveau de la variable la plus profonde de l'ensemble de conflits, False s'il n'y en a aucune
+        stack = self.stack
+        level_of = self.level_of
+        candidates = [v for v in conflicts if v in level_of]
+        if not candidates:
+            return False
+        culprit = max(candidates, key=level_of.get)
+        target = level_of[culprit]
+        skipped = len(stack) - 2 - target  # niveaux abandonnés sans essayer leurs autres valeurs
+        stack.pop()
+        while len(stack) > target + 1:
+            self.unassign(stack.pop())
+        stack[target][4].update(v for v in conflicts if v != culprit)
+        if skipped > 0:
+            self.stats["backjumps"] += 1
+            self.stats["levels_skipped"] += skipped
+        return True
+
+    def save_peak(self):
+        # Sauvegarder l'assignation courante si c'est la plus profonde atteinte
+        if self.peak:
+            self.csp.best_partial = dict(self.assignment)
+            self.peak = False
+
+    def unassign(self, frame):
+        # Annuler la valeur courante d'un niveau (assignation, heuristique et domaines)
+        if self.peak:
+            self.save_peak()
+        var = frame[0]
+        del self.assignment[var]
+        del self.level_of[var]
+        if self.value_symmetry:
+            self.max_position = frame[6]
+        self.ordering.unassigned(var)
+        self.csp.undo_domains(self.domains, frame[3])
+        frame[3] = None
+
+    def push(self):
+        # Choisir la prochaine variable et ouvrir un nouveau niveau
+        var = self.ordering.select()
+        values = self.csp.order_domain_values(var, self.assignment, self.domains)
+        if self.phases is not None and var in self.phases:
+            # Sauvegarde de phase : essayer d'abord la dernière valeur prise par la variable
+            phase = self.phases[var]
+            if phase in values:
+                values = [phase] + [value for value in values if value != phase]
+        self.stack.append([var, values, 0, None, set(), None, None])
+
+    def solutions(self):
+        # Générateur des solutions : chaque solution est une copie de l'assignation complète
+        csp = self.csp
+        domains = self.domains
+        assignment = self.assignment
+        ordering = self.ordering
+        stack = self.stack
+        stats = self.stats
+        budget = self.budget
+        on_node, on_backtrack, on_solution = self.on_node, self.on_backtrack, self.on_solution
+        nb_variables = len(csp.variables)
+        solution_found = False
+        if len(assignment) == nb_variables:
+            solution = dict(assignment)
+            if on_solution is not None:
+                on_solution(solution)
+            yield solution
+            return
+
+        self.push()
+        while stack:
+            frame = stack[-1]
+            var, values, pos, mark, conflicts = frame[:5]
+            if mark is not None:
+                self.unassign(frame)  # Retour arrière sur ce niveau : annuler la valeur courante avant d'essayer la suivante
+
+            while pos < len(values):
+                if budget is not None and budget.exhausted():
+                    self.timed_out = True
+                    self.save_peak()
+                    return
+                if self.fail_limit is not None and self.failures >= self.fail_limit:
+                    self.cutoff_reached = True
+                    return
+                value = values[pos]
+                pos += 1
+                stats["nodes"] += 1
+                if budget is not None:
+                    budget.nodes += 1
+                if on_node is not None:
+                    on_node(var, value, len(stack))
+                if self.value_symmetry and self.position(var, value) > self.max_position + 1:
+                    # Nouvelle valeur qui n'est pas la plus petite inutilisée : symétrique d'une branche déjà considérée
+                    # (le rejet dépend de toute l'assignation courante)
+                    conflicts.update(self.level_of)
+                    self.stats["symmetry_prunings"] += 1
+                    continue
+                if self.backjumping:
+                    culprit = self.find_conflict(var, value)
+                    if culprit is not None:
+                        conflicts.add(culprit)
+                        continue
+                elif not csp.is_consistent(var, value, assignment):
+                    continue
+                if self.lex_symmetry and not self.lex_leader(var, value):
+                    conflicts.update(self.level_of)
+                    self.stats["symmetry_prunings"] += 1
+                    continue
+                if self.nogoods is not None:
+                    nogood = self.nogoods.violated(var, value, assignment)
+                    if nogood is not None:
+                        conflicts.update(other_var for other_var, _ in nogood if other_var != var)
+                        self.stats["nogood_prunings"] += 1
+                        self.failures += 1
+                        continue
+                mark = domains.mark()
+                if not self.propagate(var, value):
+                    if self.backjumping:
+                        conflicts.update(self.failure_explanation())
+                    csp.undo_domains(domains, mark)
+                    self.failures += 1
+                    continue
+                assignment[var] = value  # Assigner la valeur à la variable
+                if self.phases is not None:
+                    self.phases[var] = value
+                self.level_of[var] = len(stack) - 1
+                if len(stack) > stats["max_depth"]:
+                    stats["max_depth"] = len(stack)
+                    self.peak = True
+                if self.value_symmetry:
+                    frame[6] = self.max_position
+                    self.max_position = max(self.max_position, self.position(var, value))
+                pruned = {v for v, _ in domains.trail[mark:]}
+                ordering.assigned(var)
+                ordering.domains_changed(pruned)
+                frame[3] = mark
+                frame[5] = pruned
+                break
+            frame[2] = pos
+
+            if frame[3] is None:
+                # Plus aucune valeur à essayer
+                self.failures += 1
+                stats["backtracks"] += 1
+                if on_backtrack is not None:
+                    on_backtrack(var, len(stack))
+                if not self.backjumping:
+                    stack.pop()  # Retour au niveau précédent
+                    continue
+                conflicts.update(self.pruned_by(var))
+                if self.nogoods is not None and not solution_found:
+                    self.nogoods.add((v, assignment[v]) for v in conflicts if v in assignment)
+                    self.stats["nogoods_learned"] = self.nogoods.learned
+                    self.stats["nogoods_evicted"] = self.nogoods.evicted
+                if not self.backjump(conflicts):
+                    stack.clear()  # Aucun responsable : plus de solution dans ce sous-arbre
+            elif len(assignment) == nb_variables:
+                if self.backjumping:
+                    # Après une solution, les ensembles de conflits doivent interdire de sauter des niveaux non explorés
+                    for level, other in enumerate(stack):
+                        other[4].update(stack[j][0] for j in range(level))
+                solution_found = True
+                solution = dict(assignment)
+                if on_solution is not None:
+                    on_solution(solution)
+                yield solution
+            else:
+                self.push()
@@ -0,0 +1,194 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from graph import load_col
+from coloring import COLORING
+from n_queens import N_QUEENS
+from budget import Budget, Timeout
+
+# Service de résolution local : un serveur asyncio reçoit des lots de résolutions (un objet JSON par ligne, sur une socket
+# Unix ou TCP), les répartit entre des processus de résolution gardés en vie, et renvoie chaque résultat (une ligne JSON)
+# dès qu'il est connu, puis une ligne {"done": true} à la fin du lot.
+# Requête : {"jobs": [job, ...]} ou un seul job, avec
+#   {"id": ..., "problem": "coloring", "instance": chemin du fichier .col, "nb_colors": k} ou {"problem": "n_queens", "n": n},
+#   et en option "var_heuristic", "val_heuristic", "backend", "time_limit" (secondes) et "options" (options de solve())
+# Réponse : {"id", "status": "solved" | "unsat" | "timeout" | "error", "solution" ({variable: valeur}, clés en chaînes
+#   comme toujours en JSON), "partial" (assignation partielle si "timeout"), "stats", "model_cached", "time"} ou "error"
+DEFAULT_SOCKET = os.path.join("/tmp", "ppc_solver.sock")
+MODEL_CACHE_SIZE = 16  # modèles gardés en mémoire par processus de résolution
+GRAPH_CACHE_SIZE = 64  # graphes lus gardés en mémoire par processus de résolution
+
+# Caches LRU propres à chaque processus de résolution (remplis au fil des requêtes qu'il traite)
+_models = OrderedDict()
+_graphs = OrderedDict()
+_cache_sizes = {"models": MODEL_CACHE_SIZE, "graphs": GRAPH_CACHE_SIZE}
+
+
+def _init_worker(model_cache_size, graph_cache_size):
+    # Initialisation d'un processus de résolution : tailles des caches, sorties du solveur ignorées
+    _cache_sizes["models"] = model_cache_size
+    _cache_sizes["graphs"] = graph_cache_size
+    sys.stdout = open(os.devnull, 'w')
+
+
+def _ping():
+    return os.getpid()
+
+
+def _lru_get(cache, key, size, build):
+    # Valeur associée à key dans le cache LRU (construite par build() si absente) et True si elle y était déjà
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key], True
+    value = build()
+    cache[key] = value
+    while len(cache) > size:
+        cache.popitem(last=False)
+    return value, False
+
+
+def load_graph(file_path):
+    # Graphe d'une instance, gardé en mémoire tant que le fichier ne change pas (taille et date de modification dans la clé)
+    # Retourne (graphe, clé de la version du fichier)
+    file_path = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    key = (file_path, stat.st_size, stat.st_mtime_ns)
+    return _lru_get(_graphs, key, _cache_sizes["graphs"], lambda: load_col(file_path))[0], key
+
+
+def get_model(job):
+    # Modèle CSP d'un job, pris dans le cache du processus s'il a déjà été construit avec les mêmes paramètres
+    # Retourne (modèle, True si le modèle était en cache)
+    heuristics = (job.get("var_heuristic", "static"), job.get("val_heuristic", "static"), job.get("backend", "python"))
+    if job["problem"] == "coloring":
+        graph, file_key = load_graph(job["instance"])
+        key = ("coloring", file_key, job["nb_colors"]) + heuristics
+        return _lru_get(_models, key, _cache_sizes["models"], lambda: COLORING(graph, job["nb_colors"], *heuristics))
+    if job["problem"] == "n_queens":
+        key = ("n_queens", job["n"]) + heuristics
+        return _lru_get(_models, key, _cache_sizes["models"], lambda: N_QUEENS(job["n"], *heuristics))
+    raise ValueError(f"Problème non reconnu : {job['problem']}")
+
+
+def run_job(job):
+    # Exécuter un job dans un processus de résolution ; les domaines du modèle en cache sont remis dans leur état initial
+    # après la résolution (la cohérence d'arc à la racine les réduit sur place)
+    start = time.perf_counter()
+    response = {"id": job.get("id")}
+    try:
+        csp, response["model_cached"] = get_model(job)
+        mark = csp.domains.mark()
+        try:
+            result = csp.solve(budget=Budget(time_limit=job.get("time_limit")), **job.get("options", {}))
+        finally:
+            csp.domains.undo(mark)
+        if isinstance(result, dict):
+            response.update(status="solved", solution=result)
+        elif isinstance(result, Timeout):
+            response.update(status="timeout", reason=result.reason, partial=result.partial)
+        else:
+            response["status"] = "unsat"
+        response["stats"] = csp.stats.as_dict()
+    except Exception as error:
+        response.update(status="error", error=repr(error))
+    response["time"] = time.perf_counter() - start
+    return response
+
+
+class SolveServer:
+    # Serveur asyncio : chaque connexion envoie des lots de jobs, traités dans un ProcessPoolExecutor gardé en vie entre
+    # les requêtes (pas de démarrage de Python, d'import de matplotlib ni de lecture d'instance à chaque résolution)
+    def __init__(self, workers=None, model_cache_size=MODEL_CACHE_SIZE, graph_cache_size=GRAPH_CACHE_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker, initargs=(model_cache_size, graph_cache_size))
+        # Démarrer les processus tout de suite pour que la première requête ne paie pas leur lancement
+        for future in [self.executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    async def send(self, writer, message):
+        writer.write((json.dumps(message) + "\n").encode())
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        # Une connexion : un lot de jobs par ligne, résultats renvoyés dans l'ordre où ils se terminent
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    jobs = request["jobs"] if "jobs" in request else [request]
+                    for index, job in enumerate(jobs):
+                        job.setdefault("id", index)
+                except (ValueError, TypeError, KeyError, AttributeError) as error:
+                    await self.send(writer, {"status": "error", "error": f"Requête invalide : {error!r}"})
+                    continue
+                futures = [loop.run_in_executor(self.executor, run_job, job) for job in jobs]
+                try:
+                    for future in asyncio.as_completed(futures):
+                        await self.send(writer, await future)
+                finally:
+                    for future in futures:
+                        future.cancel()  # client parti : les jobs pas encore commencés sont abandonnés
+                await self.send(writer, {"done": True, "jobs": len(jobs)})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path=None, host=None, port=None):
+        # Écouter sur la socket Unix path, ou en TCP sur (host, port) si path vaut None
+        if path is not None:
+            if os.path.exists(path):
+                os.remove(path)
+            server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+def solve_batch(jobs, path=DEFAULT_SOCKET, host=None, port=None):
+    # Client : envoyer un lot de jobs au serveur et produire les réponses au fur et à mesure qu'elles arrivent
+    if path is not None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(path)
+    else:
+        connection = socket.create_connection((host, port))
+    with connection, connection.makefile('rw') as stream:
+        stream.write(json.dumps({"jobs": list(jobs)}) + "\n")
+        stream.flush()
+        for line in stream:
+            response = json.loads(line)
+            if response.get("done"):
+                return
+            yield response
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serveur local de résolution (COLORING, N_QUEENS)")
+    parser.add_argument("--socket", default=None, help=f"socket Unix (par défaut {DEFAULT_SOCKET} si --port n'est pas donné)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="nombre de processus de résolution (nombre de cœurs par défaut)")
+    parser.add_argument("--cache-size", type=int, default=MODEL_CACHE_SIZE, help="modèles gardés en mémoire par processus")
+    args = parser.parse_args()
+    path = args.socket if args.socket is not None or args.port is not None else DEFAULT_SOCKET
+    solve_server = SolveServer(args.workers, model_cache_size=args.cache_size)
+    try:
+        asyncio.run(solve_server.serve(path=path, host=args.host, port=args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        solve_server.close()
@@ -0,0 +1,30 @@
+class SolveStats:
+    # Statistiques d'une résolution, remplies par solve() / iter_solutions() :
+    # - nodes : valeurs essayées (nœuds de l'arbre de recherche), backtracks : niveaux épuisés (retours arrière)
+    # - checks : tests de contraintes (cohérence d'arc et forward checking), revisions : révisions d'arcs
+    # - prunings : valeurs retirées des domaines par la propagation (racine comprise), max_depth : profondeur maximale
+    # - build_time, preprocessing_time, search_time : temps (en secondes) de construction du modèle, de la cohérence
+    #   d'arc initiale et de la recherche
+    # - search : compteurs propres à la recherche (sauts CBJ, nogoods, symétries, redémarrages, sous-problèmes...)
+    FIELDS = ["nodes", "backtracks", "checks", "revisions", "prunings", "max_depth", "build_time", "preprocessing_time", "search_time"]
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.get(field, 0))
+        self.search = dict(values.get("search", {}))
+
+    def as_dict(self):
+        # Dictionnaire plat des champs principaux (une colonne par champ dans les fichiers de résultats)
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def merge(self, other):
+        # Cumuler les compteurs d'une autre résolution (sous-problème d'une résolution parallèle), les temps sont gardés
+        values = other.as_dict() if isinstance(other, SolveStats) else other
+        for field in self.FIELDS:
+            if field == "max_depth":
+                self.max_depth = max(self.max_depth, values.get(field, 0))
+            elif not field.endswith("_time"):
+                setattr(self, field, getattr(self, field) + values.get(field, 0))
+
+    def __repr__(self):
+        return "SolveStats(" + ", ".join(f"{field}={getattr(self, field)!r}" for field in self.FIELDS) + ")"
@@ -0,0 +1,116 @@
+import os
+import pytest
+from n_queens import N_QUEENS
+from coloring import COLORING, chromatic_number, reduced_coloring
+from heuristics import VAR_HEURISTICS
+from budget import Timeout
+
+# Tests de non-régression : nombres de solutions des n dames et nombres chromatiques connus, pour chaque heuristique,
+# mode de propagation et backend (python -m pytest depuis la racine du projet)
+COLORING_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "instances", "coloring")
+QUEENS_COUNTS = {4: 2, 6: 4, 8: 92}
+QUEENS_SYMMETRY_CLASSES = {4: 1, 6: 1, 8: 12}  # solutions à une symétrie de l'échiquier près
+VAL_HEURISTICS = ["static", "inverse", "random", "LCV"]
+BACKENDS = ["python", "numpy"]
+PROPAGATION_MODES = {
+    "none": dict(use_ac3=False, fc=False, use_ac3_meanwhile=False),
+    "ac3": dict(use_ac3=True, fc=False, use_ac3_meanwhile=False),
+    "fc": dict(use_ac3=True, fc=True, use_ac3_meanwhile=False),
+    "mac": dict(use_ac3=True, fc=False, use_ac3_meanwhile=True),
+}
+CHROMATIC_NUMBERS = {"myciel3.col.txt": 4, "myciel4.col.txt": 5}
+
+
+def instance(file_name):
+    return os.path.join(COLORING_DIR, file_name)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("mode", sorted(PROPAGATION_MODES))
+@pytest.mark.parametrize("var_heuristic", VAR_HEURISTICS)
+def test_queens_counts(var_heuristic, mode, backend):
+    for n, count in QUEENS_COUNTS.items():
+        assert N_QUEENS(n, var_heuristic, "static", backend).count_solutions(**PROPAGATION_MODES[mode]) == count
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("val_heuristic", VAL_HEURISTICS)
+def test_queens_counts_value_heuristics(val_heuristic, backend):
+    for n, count in QUEENS_COUNTS.items():
+        assert N_QUEENS(n, "MRV", val_heuristic, backend).count_solutions(fc=True) == count
+
+
+@pytest.mark.parametrize("ac_algorithm", ["ac2001", "ac3"])
+def test_queens_counts_ac_algorithms(ac_algorithm):
+    for n, count in QUEENS_COUNTS.items():
+        assert N_QUEENS(n).count_solutions(use_ac3_meanwhile=True, ac_algorithm=ac_algorithm) == count
+
+
+@pytest.mark.parametrize("options", [dict(backjumping=True), dict(learn_nogoods=True), dict(backjumping=True, learn_nogoods=True)])
+def test_queens_counts_search_options(options):
+    for n, count in QUEENS_COUNTS.items():
+        assert N_QUEENS(n, "dom/wdeg").count_solutions(fc=True, **options) == count
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_queens_symmetry_breaking(backend):
+    for n, count in QUEENS_SYMMETRY_CLASSES.items():
+        assert N_QUEENS(n, "MRV", "static", backend).count_solutions(fc=True, symmetry_breaking=True) == count
+
+
+def test_queens_unsatisfiable():
+    for n in (2, 3):
+        assert N_QUEENS(n).solve(fc=True) == "No solution found"
+        assert N_QUEENS(n).solve(fc=True, parallel=2) == "No solution found"
+
+
+@pytest.mark.parametrize("options", [dict(), dict(restarts="luby", seed=0), dict(parallel=2)])
+def test_queens_solve(options):
+    queens = N_QUEENS(12, "MRV", "LCV")
+    solution = queens.solve(fc=True, **options)
+    assert queens.is_feasible(solution)
+
+
+def test_queens_local_search():
+    queens = N_QUEENS(200)
+    solution = queens.solve_local(seed=0)
+    assert "_pending_build" in queens.__dict__  # la recherche locale ne construit pas le modèle CSP
+    assert queens.is_feasible(solution)
+
+
+@pytest.mark.parametrize("engine", ["csp", "dsatur"])
+@pytest.mark.parametrize("file_name", sorted(CHROMATIC_NUMBERS))
+def test_chromatic_number(file_name, engine):
+    nb_colors, coloring, proven, stats = chromatic_number(instance(file_name), fc=True, var_heuristic="MRV", engine=engine,
+                                                          time_limit=None, return_stats=True)
+    assert (nb_colors, proven) == (CHROMATIC_NUMBERS[file_name], True)
+    assert stats.search["lower_bound"] <= nb_colors <= stats.search["upper_bound"]
+    assert COLORING(instance(file_name), nb_colors).is_feasible(coloring)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("mode", sorted(PROPAGATION_MODES))
+def test_coloring_at_chromatic_number(mode, backend):
+    # myciel3 : colorable avec 4 couleurs, pas avec 3
+    graph = COLORING(instance("myciel3.col.txt"), 4, "MRV", "static", backend)
+    assert graph.is_feasible(graph.solve(**PROPAGATION_MODES[mode]))
+    assert COLORING(instance("myciel3.col.txt"), 3, "MRV", "static", backend).solve(**PROPAGATION_MODES[mode]) == "No solution found"
+
+
+def test_reduced_coloring():
+    solution = reduced_coloring(instance("myciel4.col.txt"), 5, fc=True)
+    assert COLORING(instance("myciel4.col.txt"), 5).is_feasible(solution)
+    assert reduced_coloring(instance("myciel3.col.txt"), 3, fc=True) == "No solution found"
+
+
+def test_is_feasible_rejects_out_of_range_colors():
+    graph = COLORING(instance("myciel3.col.txt"), 4)
+    solution = graph.solve(fc=True)
+    vertex = next(iter(solution))
+    assert not graph.is_feasible({**solution, vertex: 4})
+    assert not graph.is_feasible({**solution, vertex: -1})
+
+
+def test_time_limit_returns_timeout():
+    result = COLORING(instance("myciel4.col.txt"), 4).solve(time_limit=0)
+    assert isinstance(result, Timeout)
@@ -0,0 +1,121 @@
+import numpy as np
+from propagation import AC2001
+
+
+def to_vector(mask, size):
+    # Masque de bits (entier Python) -> vecteur booléen de longueur size (case i vraie si le bit i est présent)
+    data = np.frombuffer(mask.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(data, count=size, bitorder="little").view(bool)
+
+
+def to_mask(vector):
+    # Vecteur booléen -> masque de bits (entier Python)
+    return int.from_bytes(np.packbits(vector, bitorder="little").tobytes(), "little")
+
+
+class Relation:
+    # Contrainte compilée sur les domaines initiaux de ses deux variables :
+    # - matrix : matrice booléenne de compatibilité (lignes : valeurs de x, colonnes : valeurs de y, dans l'ordre des bits)
+    # - rows : pour chaque valeur de x, les valeurs compatibles de y sous forme de masque de bits (ligne de la matrice empaquetée)
+    # - conflicts : matrice entière des couples interdits (calculée à la première utilisation, pour LCV)
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self.rows = [int.from_bytes(row.tobytes(), "little") for row in np.packbits(matrix, axis=1, bitorder="little")]
+        self.conflicts = None
+
+    def conflict_matrix(self):
+        if self.conflicts is None:
+            self.conflicts = (~self.matrix).astype(np.int64)
+        return self.conflicts
+
+
+class NumpyBackend:
+    # Version vectorisée des opérations élémentaires de la recherche : chaque contrainte est une matrice booléenne de
+    # compatibilité et chaque domaine un vecteur booléen (ou le masque de bits équivalent).
+    # Les matrices ne dépendent que de la relation et des domaines initiaux : elles sont construites à la première
+    # utilisation et partagées entre toutes les contraintes de même signature (une seule pour toutes les arêtes d'une coloration).
+    def __init__(self, csp):
+        self.csp = csp
+        self.shared = {}  # (signature, tables des valeurs de x et de y) -> Relation
+        self.relations = {}  # (id de la contrainte, id des tables des valeurs de x et de y) -> (contrainte, Relation)
+
+    def relation(self, constraint, x, y):
+        # Relation compilée de la contrainte de x vers y
+        values_x = self.csp.domains.values[x]
+        values_y = self.csp.domains.values[y]
+        key = (id(constraint), id(values_x), id(values_y))
+        entry = self.relations.get(key)
+        if entry is None:
+            shared_key = (constraint.signature(), id(values_x), id(values_y))
+            relation = self.shared.get(shared_key)
+            if relation is None:
+                relation = self.shared[shared_key] = Relation(constraint.compatibility(values_x, values_y))
+            # la contrainte est gardée avec la relation pour que son id ne puisse pas être réutilisé
+            entry = self.relations[key] = (constraint, relation)
+        return entry[1]
+
+    def forward_checking(self, var, value, assignment, domains):
+        # Forward checking : le domaine de chaque voisin non assigné est intersecté en une opération avec la ligne de
+        # la matrice correspondant à la valeur choisie
+        csp = self.csp
+        position = domains.bit_of[var][value].bit_length() - 1
+        for other_var, constraint in csp.neighbors[var]:
+            if other_var not in assignment:
+                mask = domains.masks[other_var]
+                if domains.restrict(other_var, self.relation(constraint, var, other_var).rows[position]):
+                    csp.fc_stats["prunings"] += bin(mask ^ domains.masks[other_var]).count("1")
+                csp.fc_stats["checks"] += len(domains.values[other_var])  # cases de la ligne lues
+                if domains.is_empty(other_var):
+                    csp.failed_arc = (other_var, var)
+                    if csp.ordering is not None:
+                        csp.ordering.failure(var, other_var)
+                    return False
+        return True
+
+    def conflict_counts(self, var, assignment):
+        # Pour LCV : nombre de valeurs des domaines (initiaux filtrés) des voisins non assignés incompatibles avec chaque
+        # valeur de var, pour toutes les valeurs à la fois (un produit matrice-vecteur par voisin)
+        domains = self.csp.domains
+        counts = np.zeros(len(domains.values[var]), dtype=np.int64)
+        for other_var, constraint in self.csp.neighbors[var]:
+            if other_var not in assignment:
+                vector = to_vector(domains.masks[other_var], len(domains.values[other_var]))
+                counts += self.relation(constraint, var, other_var).conflict_matrix() @ vector
+        return counts.tolist()
+
+    def order_least_constraining(self, var, assignment, domains):
+        # Valeurs du domaine de var triées par nombre de conflits croissant (tri stable, comme la version Python)
+        counts = self.conflict_counts(var, assignment)
+        bit_of = domains.bit_of[var]
+        return sorted(domains[var], key=lambda val: counts[bit_of[val].bit_length() - 1])
+
+    def not_supported(self, x, y, i, domains):
+        # La valeur i de x n'a aucun support dans le domaine de y (une intersection de masques)
+        constraint = self.csp.constraint(x, y)
+        if constraint is None:
+            return False
+        position = domains.bit_of[x][i].bit_length() - 1
+        return not self.relation(constraint, x, y).rows[position] & domains.masks[y]
+
+
+class VectorizedAC(AC2001):
+    # AC-2001 dont la révision d'un arc est un produit matrice-vecteur booléen : les valeurs de x supportées sont
+    # celles dont la ligne de la matrice de compatibilité rencontre le vecteur du domaine de y.
+    # La file des arcs et le point fixe sont ceux d'AC2001, les domaines obtenus sont donc identiques.
+    # checks compte ici les cases de matrice lues.
+    def __init__(self, csp):
+        super().__init__(csp)
+        self.backend = csp.vectors
+
+    def revise(self, x, y, constraint, domains):
+        # Retirer du domaine de x les valeurs sans support dans le domaine de y, retourne True si le domaine a changé
+        self.revisions += 1
+        relation = self.backend.relation(constraint, x, y)
+        matrix = relation.matrix
+        supported = matrix.dot(to_vector(domains.masks[y], matrix.shape[1]))
+        self.checks += matrix.size
+        mask_x = domains.masks[x]
+        if not domains.restrict(x, to_mask(supported)):
+            return False
+        self.prunings += bin(mask_x ^ domains.masks[x]).count("1")
+        return True